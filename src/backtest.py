@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+Replay candidate trade strategies against historical Uniswap v3 pool states.
+
+Pool states (sqrt price and liquidity after every recorded swap) are taken
+from swaps in the subgraph's format. The subgraph's pool.liquidity is the
+liquidity at query time, not at the swap, so the liquidity of each state
+comes from the swap's own "liquidity" field, recorded from the pool's Swap
+event logs on a node, or failing that from the pool's poolHourDatas of the
+hour it happened in. tests/fixtures/synthetic_swaps.json holds generated
+swaps in that format. For every combination of trade size, slippage and number of splits the trade is
+quoted at each historical state and executed against the following states,
+all combinations at once with numpy. Large parameter sweeps are spread over
+several processes.
+
+The pool math assumes every trade stays within the active tick range, which
+holds as long as trades are small compared to the pool's liquidity.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+Q96 = 2 ** 96
+
+def pool_ids(swaps) -> list:
+    """
+    Return the ids of the pools in the swaps, most traded first.
+    """
+    counts = {}
+    for swap in swaps:
+        counts[swap["pool"]["id"]] = counts.get(swap["pool"]["id"], 0) + 1
+    return sorted(counts, key=counts.get, reverse=True)
+
+def swap_liquidity(swap: dict, hourly: dict) -> float:
+    """
+    Active liquidity of the pool right after a swap.
+    """
+    if "liquidity" in swap:
+        return float(swap["liquidity"])
+    hour = int(swap["timestamp"]) // 3600 * 3600
+    if hour not in hourly:
+        raise ValueError(
+            f"Swap {swap['id']} has no liquidity, record swaps with the liquidity of their Swap event "
+            "or pass the pool's poolHourDatas covering them"
+        )
+    return hourly[hour]
+
+def pool_states(swaps, pool_id: str, pool_hours=None) -> dict:
+    """
+    Build the state of a pool after each of its recorded swaps, in time order.
+
+    Args:
+        swaps: Swaps in the subgraph's format
+        pool_id: The pool to build the states of
+        pool_hours: Optional poolHourDatas of the pool (periodStartUnix and
+            liquidity), used for swaps without their own liquidity
+    """
+    rows = sorted(
+        (swap for swap in swaps if swap["pool"]["id"] == pool_id),
+        key=lambda swap: int(swap["timestamp"]),
+    )
+    if not rows:
+        raise ValueError(f"No swaps found for pool {pool_id}")
+    hourly = {int(hour["periodStartUnix"]): float(hour["liquidity"]) for hour in pool_hours or []}
+    first = rows[0]
+    return {
+        "pool_id": pool_id,
+        "token0": first["token0"]["symbol"],
+        "token1": first["token1"]["symbol"],
+        "decimals0": int(first["token0"]["decimals"]),
+        "decimals1": int(first["token1"]["decimals"]),
+        "fee": int(first["pool"]["feeTier"]) / 1e6,
+        "timestamp": np.array([int(row["timestamp"]) for row in rows], dtype=np.int64),
+        "sqrt_price": np.array([int(row["sqrtPriceX96"]) / Q96 for row in rows]),
+        "liquidity": np.array([swap_liquidity(row, hourly) for row in rows]),
+    }
+
+def swap_output(sqrt_price, liquidity, amount_in, fee: float, zero_for_one: bool):
+    """
+    Raw output amount of a swap within a single tick range.
+    Works element-wise on numpy arrays, which broadcast against each other.
+    """
+    amount = amount_in * (1 - fee)
+    if zero_for_one:
+        return liquidity * amount * sqrt_price ** 2 / (liquidity + amount * sqrt_price)
+    sqrt_price_after = sqrt_price + amount / liquidity
+    return amount / (sqrt_price * sqrt_price_after)
+
+def parameter_grid(amounts, slippage_bps, splits) -> np.ndarray:
+    """
+    Every combination of trade size (in token units), slippage in basis
+    points and number of splits, one row per strategy.
+    """
+    return np.array(list(itertools.product(amounts, slippage_bps, splits)), dtype=float)
+
+def simulate(states: dict, grid: np.ndarray, zero_for_one: bool = True,
+             gas_per_swap: int = 130_000, gas_price_gwei: float = 20.0) -> list:
+    """
+    Replay every strategy of the grid against the pool states.
+
+    At every state the trade is quoted, then its splits are executed one per
+    following state. A split reverts when its output is below the quote minus
+    the slippage tolerance. Own splits are assumed to be arbitraged away
+    before the next one executes.
+
+    Returns:
+        One dict per strategy with the mean realized output (in token units),
+        fill and revert rates, price impact against the quoted mid price in
+        basis points (pool fee included) and the gas spent per trade
+    """
+    sqrt_price = states["sqrt_price"]
+    liquidity = states["liquidity"]
+    fee = states["fee"]
+    decimals_in, decimals_out = (
+        (states["decimals0"], states["decimals1"]) if zero_for_one else (states["decimals1"], states["decimals0"])
+    )
+
+    max_splits = int(grid[:, 2].max())
+    decisions = len(sqrt_price) - max_splits
+    if decisions <= 0:
+        raise ValueError(f"Need more than {max_splits} pool states to replay {max_splits} splits")
+
+    # Shapes: strategies (P, 1) broadcast against decision points (1, N)
+    amount_in = grid[:, 0:1] * 10 ** decimals_in
+    slippage = grid[:, 1:2] / 1e4
+    splits = grid[:, 2:3]
+    chunk = amount_in / splits
+
+    quote_price = sqrt_price[None, :decisions]
+    quote_liquidity = liquidity[None, :decisions]
+    min_out = swap_output(quote_price, quote_liquidity, chunk, fee, zero_for_one) * (1 - slippage)
+
+    realized = np.zeros((len(grid), decisions))
+    filled = np.zeros_like(realized)
+    reverted = np.zeros_like(realized)
+    for k in range(max_splits):
+        active = k < splits
+        out = swap_output(
+            sqrt_price[None, 1 + k:1 + k + decisions],
+            liquidity[None, 1 + k:1 + k + decisions],
+            chunk, fee, zero_for_one,
+        )
+        ok = active & (out >= min_out)
+        realized += np.where(ok, out, 0.0)
+        filled += np.where(ok, chunk, 0.0)
+        reverted += active & ~ok
+
+    mid_price = quote_price ** 2 if zero_for_one else 1 / quote_price ** 2
+    ideal = filled * mid_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        impact = np.where(filled > 0, 1 - realized / ideal, np.nan)
+
+    gas_units = grid[:, 2] * gas_per_swap
+    results = []
+    for p, (amount, slippage_bps, n_splits) in enumerate(grid):
+        filled_any = ~np.isnan(impact[p])
+        results.append({
+            "amount_in": float(amount),
+            "slippage_bps": float(slippage_bps),
+            "splits": int(n_splits),
+            "trades": decisions,
+            "realized_out": float(realized[p].mean() / 10 ** decimals_out),
+            "fill_rate": float(filled[p].mean() / amount_in[p, 0]),
+            "revert_rate": float(reverted[p].mean() / n_splits),
+            "price_impact_bps": float(impact[p][filled_any].mean() * 1e4) if filled_any.any() else None,
+            "gas_units": int(gas_units[p]),
+            "gas_eth": float(gas_units[p] * gas_price_gwei * 1e-9),
+        })
+    return results
+
+def run_backtest(states: dict, grid: np.ndarray, zero_for_one: bool = True, processes: int | None = None,
+                 chunk_size: int = 64, **gas) -> list:
+    """
+    Simulate the grid, spreading chunks of strategies over a process pool
+    when there are more than chunk_size of them. processes=1 keeps it in
+    this process.
+    """
+    if processes == 1 or len(grid) <= chunk_size:
+        return simulate(states, grid, zero_for_one, **gas)
+    chunks = np.array_split(grid, -(-len(grid) // chunk_size))
+    # Spawn rather than fork, callers such as the pipeline run other threads
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        parts = pool.map(partial(simulate, states, zero_for_one=zero_for_one, **gas), chunks)
+        return [result for part in parts for result in part]
+
+def main():
+    """
+    Main function for the backtest script.
+    """
+    parser = argparse.ArgumentParser(description="Backtest trade strategies against recorded Uniswap swaps")
+    parser.add_argument("swaps", type=str, help="JSON file of swaps in the subgraph format")
+    parser.add_argument("--pool", type=str, default=None,
+                        help="The pool id to replay, defaults to the most traded pool")
+    parser.add_argument("--pool-hours", type=str, default=None,
+                        help="JSON file of the pool's poolHourDatas, for swaps recorded without their liquidity")
+    parser.add_argument("--sell", choices=["token0", "token1"], default="token0",
+                        help="Which token of the pool is sold")
+    parser.add_argument("--amount", type=float, nargs="+", default=[1.0],
+                        help="Trade sizes in units of the sold token")
+    parser.add_argument("--slippage", type=float, nargs="+", default=[10, 50, 100],
+                        help="Slippage tolerances in basis points")
+    parser.add_argument("--splits", type=int, nargs="+", default=[1, 2, 4],
+                        help="Numbers of splits to execute each trade in")
+    parser.add_argument("--gas-price", type=float, default=20.0, help="Gas price in gwei")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes for large sweeps, defaults to the number of CPUs")
+
+    args = parser.parse_args()
+
+    with open(args.swaps) as f:
+        swaps = json.load(f)
+    pool_hours = None
+    if args.pool_hours:
+        with open(args.pool_hours) as f:
+            pool_hours = json.load(f)
+    states = pool_states(swaps, args.pool or pool_ids(swaps)[0], pool_hours)
+    zero_for_one = args.sell == "token0"
+    token_in, token_out = (
+        (states["token0"], states["token1"]) if zero_for_one else (states["token1"], states["token0"])
+    )
+
+    grid = parameter_grid(args.amount, args.slippage, args.splits)
+    results = run_backtest(states, grid, zero_for_one, processes=args.processes, gas_price_gwei=args.gas_price)
+
+    print(f"Pool {states['pool_id']} ({states['token0']}/{states['token1']}), "
+          f"{len(states['sqrt_price'])} states, selling {token_in} for {token_out}")
+    print(f"{'amount':>12} {'slip bps':>8} {'splits':>6} {'out':>14} {'fill':>6} {'revert':>6} {'impact bps':>10} {'gas eth':>10}")
+    for result in results:
+        impact = result["price_impact_bps"]
+        print(f"{result['amount_in']:>12g} {result['slippage_bps']:>8g} {result['splits']:>6} "
+              f"{result['realized_out']:>14.6f} {result['fill_rate']:>6.2f} {result['revert_rate']:>6.2f} "
+              f"{'n/a' if impact is None else f'{impact:.1f}':>10} {result['gas_eth']:>10.5f}")
+
+if __name__ == "__main__":
+    main()
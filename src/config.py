@@ -1,11 +1,234 @@
 import os
-from pydantic import BaseModel, Field, SecretStr
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import get_origin
+from pydantic import BaseModel, Field, SecretStr, TypeAdapter
 
 # You may also import relevant Portia enums if you want to unify them with your own config
 # e.g. from portia import LLMProvider, StorageClass, Config as PortiaConfig
 
-load_dotenv()
+@lru_cache(maxsize=None)
+def load_env():
+    """
+    Load the .env file into the environment.
+    This only does work on the first call, so every module can call it.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+load_env()
+
+# Performance defaults per environment, selected with UNISWAP_PROFILE.
+# Any single field can still be overridden with UNISWAP_PERF_<FIELD_NAME>.
+PERFORMANCE_PROFILES = {
+    "development": {
+        "max_concurrent_steps": 4,
+        "stream_poll_interval": 0.1,
+        "http_pool_connections": 4,
+        "http_pool_maxsize": 8,
+        "request_timeout": 30.0,
+        "max_retries": 2,
+        "cache_max_entries": 256,
+        "cache_ttl_seconds": 30.0,
+        "batch_size": 100,
+        "retry_base_delay": 0.2,
+        "retry_max_delay": 2.0,
+        "hedge_requests": False,
+        "hedge_delay": 1.0,
+        "circuit_failure_threshold": 5,
+        "circuit_reset_timeout": 30.0,
+        "freshness_poll_interval": 12.0,
+        "freshness_timeout": 2.0,
+        "live_ingest_enabled": False,
+        "ingest_poll_interval": 15.0,
+        "ingest_backfill_seconds": 3600.0,
+        "aggregator_max_keys": 2048,
+        "report_workers": 2,
+        "report_timeout": 120.0,
+    },
+    "production": {
+        "max_concurrent_steps": 8,
+        "stream_poll_interval": 0.05,
+        "http_pool_connections": 16,
+        "http_pool_maxsize": 32,
+        "request_timeout": 10.0,
+        "max_retries": 3,
+        "cache_max_entries": 4096,
+        "cache_ttl_seconds": 60.0,
+        "batch_size": 1000,
+        "retry_base_delay": 0.1,
+        "retry_max_delay": 2.0,
+        "hedge_requests": True,
+        "hedge_delay": 0.5,
+        "circuit_failure_threshold": 5,
+        "circuit_reset_timeout": 15.0,
+        "freshness_poll_interval": 12.0,
+        "freshness_timeout": 1.0,
+        "live_ingest_enabled": True,
+        "ingest_poll_interval": 5.0,
+        "ingest_backfill_seconds": 86400.0,
+        "aggregator_max_keys": 8192,
+        "report_workers": 4,
+        "report_timeout": 120.0,
+    },
+    "test": {
+        "max_concurrent_steps": 2,
+        "stream_poll_interval": 0.01,
+        "http_pool_connections": 1,
+        "http_pool_maxsize": 2,
+        "request_timeout": 5.0,
+        "max_retries": 0,
+        "cache_max_entries": 16,
+        "cache_ttl_seconds": 0.0,
+        "batch_size": 10,
+        "retry_base_delay": 0.0,
+        "retry_max_delay": 0.0,
+        "hedge_requests": False,
+        "hedge_delay": 0.1,
+        "circuit_failure_threshold": 2,
+        "circuit_reset_timeout": 0.1,
+        "freshness_poll_interval": 0.1,
+        "freshness_timeout": 0.5,
+        "live_ingest_enabled": False,
+        "ingest_poll_interval": 0.1,
+        "ingest_backfill_seconds": 60.0,
+        "aggregator_max_keys": 64,
+        "report_workers": 1,
+        "report_timeout": 60.0,
+    },
+}
+
+class PerformanceConfig(BaseModel):
+    """
+    Timeouts, pool sizes, retries and cache limits used by the pipeline,
+    the trader and the tools.
+    """
+    max_concurrent_steps: int = Field(
+        default=4, ge=1,
+        description="Maximum number of plan steps run at the same time"
+    )
+    stream_poll_interval: float = Field(
+        default=0.1, gt=0,
+        description="Seconds between checks for new step outputs when streaming"
+    )
+    http_pool_connections: int = Field(
+        default=4, ge=1,
+        description="Number of HTTP connection pools to keep"
+    )
+    http_pool_maxsize: int = Field(
+        default=8, ge=1,
+        description="Maximum number of connections per HTTP pool"
+    )
+    request_timeout: float = Field(
+        default=30.0, gt=0,
+        description="Timeout in seconds for outbound HTTP and API calls"
+    )
+    max_retries: int = Field(
+        default=2, ge=0,
+        description="Retries for idempotent outbound calls"
+    )
+    retry_base_delay: float = Field(
+        default=0.2, ge=0,
+        description="Base delay in seconds of the jittered exponential backoff between retries"
+    )
+    retry_max_delay: float = Field(
+        default=2.0, ge=0,
+        description="Maximum delay in seconds between retries"
+    )
+    hedge_requests: bool = Field(
+        default=False,
+        description="Send a duplicate idempotent request when the first one is slower than the p95"
+    )
+    hedge_delay: float = Field(
+        default=1.0, gt=0,
+        description="Seconds to wait before hedging until enough latencies are known for a p95"
+    )
+    circuit_failure_threshold: int = Field(
+        default=5, ge=1,
+        description="Consecutive failures that open an upstream circuit"
+    )
+    circuit_reset_timeout: float = Field(
+        default=30.0, gt=0,
+        description="Seconds an open circuit fails fast before letting a trial call through"
+    )
+    cache_max_entries: int = Field(
+        default=256, ge=0,
+        description="Maximum number of entries in in-memory caches"
+    )
+    cache_ttl_seconds: float = Field(
+        default=30.0, ge=0,
+        description="Default time to live of cached results, 0 disables caching"
+    )
+    freshness_poll_interval: float = Field(
+        default=12.0, ge=0,
+        description="Seconds between checks of the latest indexed block used to key cached results"
+    )
+    freshness_timeout: float = Field(
+        default=2.0, gt=0,
+        description="Timeout in seconds of a latest indexed block check, which is never retried"
+    )
+    tool_cache_ttls: dict[str, float] = Field(
+        default_factory=dict,
+        description="Per tool id TTLs in seconds overriding cache_ttl_seconds"
+    )
+    cache_dir: str | None = Field(
+        default=None,
+        description="Directory of the on-disk result cache shared between processes, None keeps it in memory only"
+    )
+    live_ingest_enabled: bool = Field(
+        default=False,
+        description="Poll the subgraph for new swaps in the background to keep live aggregates"
+    )
+    ingest_poll_interval: float = Field(
+        default=15.0, gt=0,
+        description="Seconds between polls of the swap ingest loop"
+    )
+    ingest_backfill_seconds: float = Field(
+        default=3600.0, ge=0,
+        description="How far back in seconds the swap ingest loop starts from"
+    )
+    aggregator_max_keys: int = Field(
+        default=2048, ge=1,
+        description="Maximum number of tokens and pairs tracked by the live aggregator"
+    )
+    report_workers: int = Field(
+        default=2, ge=1,
+        description="Worker processes rendering PPTX and PDF reports"
+    )
+    report_timeout: float = Field(
+        default=120.0, gt=0,
+        description="Seconds a tool waits for a report to be rendered"
+    )
+    reports_dir: str = Field(
+        default="reports",
+        description="Directory rendered reports and their cached charts are written to"
+    )
+    batch_size: int = Field(
+        default=100, ge=1, le=1000,
+        description="Page size for subgraph queries (The Graph caps this at 1000)"
+    )
+
+    @classmethod
+    def from_env(cls, profile: str | None = None) -> "PerformanceConfig":
+        """
+        Build the performance config for a profile, applying any
+        UNISWAP_PERF_<FIELD_NAME> overrides from the environment.
+        Overrides of dict fields are given as JSON, e.g. '{"custom_tool": 5}'.
+        """
+        profile = profile or os.getenv("UNISWAP_PROFILE", "development")
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(
+                f"Unknown profile '{profile}'. Available profiles: {', '.join(PERFORMANCE_PROFILES)}"
+            )
+        values = dict(PERFORMANCE_PROFILES[profile])
+        for name, field in cls.model_fields.items():
+            override = os.getenv(f"UNISWAP_PERF_{name.upper()}")
+            if override is None:
+                continue
+            if get_origin(field.annotation) in (dict, list):
+                values[name] = TypeAdapter(field.annotation).validate_json(override)
+            else:
+                values[name] = override
+        return cls(**values)
 
 class UniswapProjectConfig(BaseModel):
     """
@@ -29,6 +252,31 @@ class UniswapProjectConfig(BaseModel):
         default_factory=lambda: SecretStr(os.getenv("ENSO_API_KEY", "")),
         description="Enso API key for Uniswap trading"
     )
+    chain_id: int = Field(
+        default_factory=lambda: int(os.getenv("UNISWAP_CHAIN_ID", "1")),
+        gt=0,
+        description="Chain id shown in the logged trade request, the SDK picks the chain itself"
+    )
+    slippage_bps: int = Field(
+        default_factory=lambda: int(os.getenv("UNISWAP_SLIPPAGE_BPS", "50")),
+        ge=0, le=10000,
+        description="Slippage shown in the logged trade request, the SDK applies its own"
+    )
+    profile: str = Field(
+        default_factory=lambda: os.getenv("UNISWAP_PROFILE", "development"),
+        description="Name of the performance profile in use"
+    )
+    performance: PerformanceConfig = Field(
+        default_factory=lambda data: PerformanceConfig.from_env(data["profile"]),
+        description="Performance and tuning settings"
+    )
 
     # Optionally, add more toggles or references to LLM providers
     # or reuse the actual Portia Config if you want.
+
+@lru_cache(maxsize=None)
+def get_project_config() -> UniswapProjectConfig:
+    """
+    Return the process wide project config, built from the environment on first use.
+    """
+    return UniswapProjectConfig()
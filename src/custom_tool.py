@@ -4,24 +4,106 @@ Your colleague can fill in the logic for querying the subgraph,
 producing JSON, or generating a PDF/pptx, etc.
 """
 
+import itertools
+import json
+import time
 from portia.tool import Tool, ToolRunContext
-from typing import Tuple
-# from pydantic import BaseModel, Field
+from typing import Literal, Tuple
+from pydantic import BaseModel, Field
 # import requests, python-pptx, etc.
 
+class CustomToolSchema(BaseModel):
+    """
+    Input for CustomTool. Leave token, pair and top_pairs empty for the placeholder result.
+    """
+    token: str | None = Field(
+        default=None, description="Token symbol or address to get live swap stats for, e.g. WETH"
+    )
+    pair: str | None = Field(
+        default=None, description="Pair of token symbols or addresses to get live swap stats for, e.g. WETH/USDC"
+    )
+    top_pairs: int | None = Field(default=None, ge=1, description="Number of top pairs by volume to return")
+    window: Literal["1h", "24h", "7d"] = Field(default="24h", description="Rolling window of the stats")
+    report: Literal["pptx", "pdf"] | None = Field(
+        default=None,
+        description="Render the top pairs as a slide deck (pptx) or PDF and return the file path"
+    )
+
+def token_addresses(aggregator, token: str) -> list:
+    """
+    Return the addresses a token argument may refer to, a symbol can match
+    several tokens.
+    """
+    if token.lower().startswith("0x"):
+        return [token.lower()]
+    return aggregator.addresses(token)
+
 class CustomTool(Tool):
     """
     Example placeholder for a custom Tool.
     """
     id: str = "custom_tool"
     name: str = "Custom Uniswap Tool"
-    description: str = "Handles Uniswap subgraph queries and returns a structured result"
+    description: str = (
+        "Handles Uniswap subgraph queries and returns a structured result. "
+        "Give a token, a pair or top_pairs to get live volume, swap count and VWAP "
+        "over the last 1h, 24h or 7d. Set report to pptx or pdf to get a report file on the top pairs"
+    )
+    args_schema: type[BaseModel] = CustomToolSchema
 
     # Add proper type annotation for output_schema
     output_schema: Tuple[str, str] = ("str", "Placeholder output")
 
-    def run(self, ctx: ToolRunContext) -> str:
-        # placeholder logic
-        # in reality, parse user arguments, call uniswap subgraph, etc.
-        return "Placeholder result from custom tool"
+    def run(
+        self,
+        ctx: ToolRunContext,
+        token: str | None = None,
+        pair: str | None = None,
+        top_pairs: int | None = None,
+        window: str = "24h",
+        report: str | None = None,
+    ) -> str:
+        if token is None and pair is None and top_pairs is None and report is None:
+            # placeholder logic
+            # in reality, parse user arguments, call uniswap subgraph, etc.
+            return "Placeholder result from custom tool"
+
+        # Live stats come from the rolling aggregates, never from rescanning history
+        from swap_aggregator import get_live_aggregator
+
+        aggregator = get_live_aggregator()
+        if aggregator is None:
+            return "Live swap data is not available, enable live_ingest_enabled in the performance config"
+        # Windows follow the wall clock, not the latest ingested swap
+        now = time.time()
+        if report is not None:
+            # Rendering happens in a worker process, this thread only waits for the file
+            from config import get_project_config
+            from reports import get_report_renderer, top_pairs_report
+
+            pairs = aggregator.top_pairs(window, top_pairs or 5, now)
+            future = get_report_renderer().submit(top_pairs_report(pairs, window), report)
+            return future.result(timeout=get_project_config().performance.report_timeout)
+        if top_pairs is not None:
+            return json.dumps(aggregator.top_pairs(window, top_pairs, now))
+        query = pair or token
+        if pair is not None:
+            base, _, quote = pair.partition("/")
+            keys = [
+                f"{address0}/{address1}"
+                for address0, address1 in itertools.product(
+                    token_addresses(aggregator, base), token_addresses(aggregator, quote)
+                )
+            ]
+        else:
+            keys = token_addresses(aggregator, token)
+        matches = [stats for stats in (aggregator.stats(key, window, now) for key in keys) if stats is not None]
+        if not matches:
+            return f"No swaps seen for {query} in the last {window}"
+        if len(matches) == 1:
+            return json.dumps(matches[0])
+        # Several tokens share the symbol, return them all so the caller can
+        # tell the genuine token from copies by address and volume
+        matches.sort(key=lambda stats: stats["volume_usd"], reverse=True)
+        return json.dumps(matches)
 
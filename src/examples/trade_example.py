@@ -6,15 +6,10 @@ Example script demonstrating how to use the UniswapTrader functionality from the
 import os
 import sys
 import argparse
-from dotenv import load_dotenv
 
-# Add the parent directory to the path so we can import from src
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from src.uniswap_trader import get_uniswap_trader
-
-# Load environment variables
-load_dotenv()
+# Add src, the parent directory, to the path so the lazy imports of its
+# modules below work however this script is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Common token addresses
 COMMON_TOKENS = {
@@ -30,6 +25,10 @@ def main():
     """
     Main function for the trade example script.
     """
+    # Load environment variables before the defaults below read them
+    from config import load_env
+    load_env()
+
     parser = argparse.ArgumentParser(description="Execute a trade on Uniswap")
     parser.add_argument("--from-address", type=str, default=os.getenv("WALLET_ADDRESS", ""),
                         help="The Ethereum address that will execute the trade")
@@ -58,9 +57,14 @@ def main():
     token_out_address = COMMON_TOKENS[args.token_out]
     
     # Get the optimal route
+    # Imported here so bad arguments fail fast without loading Portia and web3
+    from uniswap_trader import get_enso_caller, get_uniswap_trader
     print("Getting optimal route...")
     trader = get_uniswap_trader()
-    route_response = trader.get_optimal_route(
+    # Quotes are idempotent, so they are retried and hedged when slow
+    enso = get_enso_caller()
+    route_response = enso.call(
+        trader.get_optimal_route,
         from_address=args.from_address,
         amount_in=args.amount_in,
         token_in=token_in_address,
@@ -82,7 +86,8 @@ def main():
         confirm = input("\nDo you want to execute this trade? (y/n): ")
         if confirm.lower() == 'y':
             print("Executing trade...")
-            tx_hash = trader.execute_trade(route_response)
+            # Trades are never retried, a timed out trade may still go through
+            tx_hash = enso.call(trader.execute_trade, route_response, idempotent=False)
             print(f"Trade executed with transaction hash: {tx_hash}")
         else:
             print("Trade cancelled.")
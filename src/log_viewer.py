@@ -8,13 +8,10 @@ import os
 import sys
 import argparse
 import logging
-from dotenv import load_dotenv
 
-# Add the parent directory to the path so we can import from src
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-# Load environment variables
-load_dotenv()
+# Add src to the path so the lazy imports of its modules below work
+# however this script is started
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Set up logging
 logging.basicConfig(
@@ -25,9 +22,23 @@ logging.basicConfig(
     ]
 )
 
-# Import the modules to ensure their loggers are set up
-from src.uniswap_trader import get_uniswap_trader, execute_uniswap_trade
-from src.main import run_pipeline
+class ModuleFilter(logging.Filter):
+    """
+    Only let WARNING and above through for project loggers outside module.
+    Matching on logger name prefixes also covers loggers created after the
+    filter is installed, e.g. by modules imported lazily.
+    """
+    def __init__(self, module):
+        super().__init__()
+        self.prefix = f"uniswap_portia.{module}"
+
+    def filter(self, record):
+        name = record.name
+        if name != "uniswap_portia" and not name.startswith("uniswap_portia."):
+            return True
+        if name == self.prefix or name.startswith(self.prefix + "."):
+            return True
+        return record.levelno >= logging.WARNING
 
 def main():
     """
@@ -52,9 +63,9 @@ def main():
     
     # Filter logs by module if specified
     if args.module != "all":
-        for name in logging.root.manager.loggerDict:
-            if name.startswith("uniswap_portia") and not name.startswith(f"uniswap_portia.{args.module}"):
-                logging.getLogger(name).setLevel(logging.WARNING)
+        module_filter = ModuleFilter(args.module)
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(module_filter)
     
     # Also show Portia SDK logs if requested
     if args.module == "portia" or args.module == "all":
@@ -67,22 +78,30 @@ def main():
     # Run a test to generate logs if requested
     if args.test:
         print("Running tests to generate logs...")
+        # Only load the env and the heavy Portia/web3 modules when we need them
+        from config import load_env
+        load_env()
         
         # Test the trader
         if args.module in ["all", "trader", "portia"]:
             print("\nTesting UniswapTrader...")
+            from uniswap_trader import get_uniswap_trader
             trader = get_uniswap_trader()
             print("UniswapTrader initialized")
         
         # Test the pipeline
         if args.module in ["all", "pipeline"]:
             print("\nTesting Portia pipeline...")
+            from main import run_pipeline
             result = run_pipeline("What's the volume for WETH last week?")
-            print(f"Pipeline result: {result}")
+            print(f"Pipeline result: {result.outputs}")
     
     # Run a test trade if requested
     if args.test_trade:
         print("\nTesting Uniswap trade...")
+        from config import load_env
+        from uniswap_trader import execute_uniswap_trade
+        load_env()
         # Use default values for testing
         from_address = os.getenv("WALLET_ADDRESS", "0xD599b4840Da7ABB19A7BAe8F70FBA422eabf783C")
         amount_in = "1000000000000000000"  # 1 ETH in wei
@@ -1,32 +1,71 @@
 import os
+import time
 import logging
-from dotenv import load_dotenv
-from portia import Portia, default_config
-from custom_tool import CustomTool
-from config import UniswapProjectConfig
-from uniswap_trader import get_uniswap_trader, execute_uniswap_trade
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, NamedTuple
+from config import get_project_config, load_env
 
 # Set up logging
 logger = logging.getLogger("uniswap_portia.pipeline")
 
-load_dotenv()
+load_env()
+
+@lru_cache(maxsize=None)
+def get_tool_cache():
+    """
+    Return the process wide tool result cache, shared by every Portia
+    instance so repeated questions across runs and users hit the cache.
+    """
+    from tool_cache import ToolResultCache
+
+    performance = get_project_config().performance
+    return ToolResultCache(
+        max_entries=performance.cache_max_entries,
+        default_ttl=performance.cache_ttl_seconds,
+        ttl_policies=performance.tool_cache_ttls,
+        cache_dir=performance.cache_dir,
+    )
 
 def get_portia_instance():
     """
     Set up a Portia instance with default_config, adding your custom tool.
     """
+    # Portia is slow to import, only pay for it once we actually need it
+    from portia import Portia, default_config
+    from custom_tool import CustomTool
+    from reports import report_still_exists
+    from subgraph import get_latest_indexed_block
+    from tool_cache import with_cache
+
     logger.info("Initializing Portia instance")
     
-    # 1) Possibly create or retrieve your own config
-    project_config = UniswapProjectConfig()
+    # 1) Retrieve the process wide project config
+    project_config = get_project_config()
+    logger.info(f"Using performance profile '{project_config.profile}'")
     # 2) Build a Portia config
     #    e.g. storage_class=MEMORY, or pass in your own logic
     config = default_config()
 
     # 3) If you want to store data in the cloud, ensure PORTIA_API_KEY is set, etc.
 
-    # 4) Instantiate your custom tool
-    custom_tool = CustomTool()
+    # Keep live swap aggregates up to date for the custom tool
+    performance = project_config.performance
+    if performance.live_ingest_enabled:
+        from swap_aggregator import start_live_ingest
+        start_live_ingest(
+            poll_interval=performance.ingest_poll_interval,
+            batch_size=performance.batch_size,
+            backfill_seconds=performance.ingest_backfill_seconds,
+            max_keys=performance.aggregator_max_keys,
+        )
+
+    # 4) Instantiate your custom tool, serving repeated calls from the cache
+    #    until the subgraph indexes a new block or a cached report file is deleted
+    custom_tool = with_cache(
+        CustomTool(), get_tool_cache(), freshness=get_latest_indexed_block, valid=report_still_exists
+    )
     logger.info("Custom tool initialized")
 
     # 5) Create the Portia instance with your custom tool
@@ -34,13 +73,193 @@ def get_portia_instance():
     logger.info("Portia instance initialized successfully")
     return portia
 
-def run_pipeline(user_prompt: str):
+def plan_step_levels(plan):
+    """
+    Group the steps of a plan into levels of mutually independent steps.
+
+    A step depends on an earlier step when one of its inputs (or its
+    condition) refers to that step's output. Every step in a level only
+    depends on steps in earlier levels, so the steps of one level can run
+    concurrently.
+
+    Returns:
+        A list of levels, each a list of step indexes in plan order
+    """
+    producers = {}
+    depths = []
+    for index, step in enumerate(plan.steps):
+        deps = {producers[var.name] for var in step.inputs if var.name in producers}
+        if step.condition:
+            deps.update(i for name, i in producers.items() if name in step.condition)
+        depths.append(1 + max((depths[i] for i in deps), default=-1))
+        if step.output:
+            producers[step.output] = index
+
+    levels = [[] for _ in range(max(depths, default=-1) + 1)]
+    for index, depth in enumerate(depths):
+        levels[depth].append(index)
+    return levels
+
+class PlanStepFailedError(RuntimeError):
+    """
+    Raised by execute_plan_concurrently when a step run ends in the FAILED state.
+    """
+    def __init__(self, step_run, outputs):
+        super().__init__(f"Plan step failed in plan run {step_run.id}")
+        self.step_run = step_run
+        self.outputs = outputs
+
+def _build_step_plan(plan, step):
+    """
+    Build a single step plan sharing the context of plan.
+    """
+    from portia.plan import Plan
+
+    return Plan(plan_context=plan.plan_context, steps=[step])
+
+def _run_single_step(portia, plan, step, upstream_outputs):
+    """
+    Run one step of a plan as its own single step plan run, seeded with the
+    outputs of the steps it depends on.
+    """
+    step_plan = _build_step_plan(plan, step)
+    # resume() loads the plan from storage by plan_run.plan_id
+    portia.storage.save_plan(step_plan)
+    plan_run = portia.create_plan_run(step_plan)
+    plan_run.outputs.step_outputs.update(upstream_outputs)
+    return portia.resume(plan_run)
+
+def _run_levels(portia, plan, outputs, max_workers, resumed_runs=()):
+    """
+    Resume resumed_runs, then run every step of plan without an output yet,
+    level by level. Stops after the first level with a failed step or a step
+    needing clarification.
+    """
+    from portia.plan_run import PlanRunState
+
+    outputs = dict(outputs)
+    pending_clarifications = []
+    failed_run = None
+
+    def _collect(step_runs):
+        nonlocal failed_run
+        # Collect in plan order so the merged outputs are deterministic
+        for step, step_run in step_runs:
+            if step_run.state == PlanRunState.NEED_CLARIFICATION:
+                pending_clarifications.append(step_run)
+                # Keep the step pending, whatever it left as its output
+                outputs.update((name, output) for name, output in step_run.outputs.step_outputs.items()
+                               if name != step.output)
+                continue
+            outputs.update(step_run.outputs.step_outputs)
+            if step_run.state == PlanRunState.FAILED:
+                failed_run = failed_run or step_run
+        return failed_run is None and not pending_clarifications
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="portia-step") as pool:
+        proceed = True
+        if resumed_runs:
+            logger.info(f"Resuming {len(resumed_runs)} clarified steps")
+            futures = [pool.submit(portia.resume, step_run) for step_run in resumed_runs]
+            # The steps of resumed runs are found again from their saved plans
+            steps = [portia.storage.get_plan(step_run.plan_id).steps[0] for step_run in resumed_runs]
+            proceed = _collect(zip(steps, (future.result() for future in futures)))
+
+        levels = plan_step_levels(plan)
+        for depth, level in enumerate(levels if proceed else []):
+            level = [index for index in level if plan.steps[index].output not in outputs]
+            if not level:
+                continue
+            logger.info(f"Running level {depth}: steps {level}")
+            futures = [
+                (plan.steps[index], pool.submit(_run_single_step, portia, plan, plan.steps[index], dict(outputs)))
+                for index in level
+            ]
+            if not _collect((step, future.result()) for step, future in futures):
+                if failed_run is not None:
+                    logger.error(f"Stopping after level {depth}: plan run {failed_run.id} failed")
+                else:
+                    logger.info(f"Stopping after level {depth}: {len(pending_clarifications)} steps need clarification")
+                break
+
+    ordered_outputs = {
+        step.output: outputs[step.output]
+        for step in plan.steps
+        if step.output in outputs
+    }
+    if failed_run is not None:
+        raise PlanStepFailedError(failed_run, ordered_outputs)
+    return ordered_outputs, pending_clarifications
+
+def execute_plan_concurrently(portia, plan, max_workers: int | None = None):
+    """
+    Execute a Portia plan, running independent steps concurrently.
+
+    Steps are scheduled level by level (see plan_step_levels) on a thread
+    pool bounded by max_workers, which defaults to the configured
+    max_concurrent_steps. If any step needs a clarification, no further levels are
+    started and the plan runs waiting on the clarification are returned so
+    the caller can resolve them and continue with resume_plan_concurrently.
+
+    Returns:
+        A tuple of the step outputs, in plan step order, and the list of plan
+        runs that need clarification
+
+    Raises:
+        PlanStepFailedError: if a step run failed, once its level has finished
+    """
+    if max_workers is None:
+        max_workers = get_project_config().performance.max_concurrent_steps
+    logger.info(f"Executing {len(plan.steps)} steps with up to {max_workers} workers")
+    return _run_levels(portia, plan, {}, max_workers)
+
+def resume_plan_concurrently(portia, plan, outputs: dict, resolved_runs: list, max_workers: int | None = None):
+    """
+    Continue a plan stopped by execute_plan_concurrently on clarifications.
+
+    The resolved plan runs are resumed, then the levels that were never
+    started are run as in execute_plan_concurrently. Steps of pending runs
+    left out of resolved_runs are run again from scratch.
+
+    Args:
+        portia: The Portia instance that started the plan
+        plan: The plan being executed
+        outputs: The outputs returned so far
+        resolved_runs: The pending plan runs, with their clarifications resolved
+
+    Returns:
+        A tuple of all the step outputs so far, in plan step order, and the
+        list of plan runs that need clarification
+
+    Raises:
+        PlanStepFailedError: if a step run failed, once its level has finished
+    """
+    if max_workers is None:
+        max_workers = get_project_config().performance.max_concurrent_steps
+    return _run_levels(portia, plan, outputs, max_workers, resumed_runs=resolved_runs)
+
+class PipelineResult(NamedTuple):
+    """
+    Result of run_pipeline. pending_runs are the plan runs waiting on
+    clarifications, resolve them and pass the result to resume_pipeline to
+    run the rest of the plan.
+    """
+    outputs: dict
+    pending_runs: list
+    plan: Any
+    portia: Any
+    concurrent: bool
+
+def run_pipeline(user_prompt: str, concurrent: bool = False) -> PipelineResult:
     """
     This function runs the entire pipeline:
       - Takes user prompt
       - Uses Portia to plan and run
       - Possibly calls your custom tool (Uniswap data) behind the scenes
-      - Returns the final output or plan_run
+      - Returns the final outputs and any plan runs waiting on clarifications
+
+    With concurrent=True independent plan steps are run in parallel
+    (see execute_plan_concurrently).
     """
     logger.info(f"Running pipeline with user prompt: {user_prompt}")
     
@@ -49,12 +268,105 @@ def run_pipeline(user_prompt: str):
     logger.info("Planning with Portia")
     plan = portia.plan(user_prompt)
     logger.info(f"Plan created: {plan}")
-    
-    logger.info("Running plan with Portia")
-    plan_run = portia.run_plan(plan)
-    logger.info(f"Plan run completed with {len(plan_run.outputs.step_outputs)} outputs")
-    
-    return plan_run.outputs.step_outputs
+
+    if concurrent:
+        logger.info("Running plan concurrently")
+        outputs, pending_runs = execute_plan_concurrently(portia, plan)
+    else:
+        logger.info("Running plan with Portia")
+        plan_run = portia.run_plan(plan)
+        outputs, pending_runs = _plan_run_result(plan_run)
+    if pending_runs:
+        logger.warning(f"{len(pending_runs)} plan runs are waiting on clarifications")
+    logger.info(f"Plan run completed with {len(outputs)} outputs")
+    return PipelineResult(outputs, pending_runs, plan, portia, concurrent)
+
+def _plan_run_result(plan_run):
+    from portia.plan_run import PlanRunState
+
+    pending_runs = [plan_run] if plan_run.state == PlanRunState.NEED_CLARIFICATION else []
+    return plan_run.outputs.step_outputs, pending_runs
+
+def resume_pipeline(result: PipelineResult, resolved_runs: list | None = None) -> PipelineResult:
+    """
+    Continue a pipeline stopped on clarifications, once they are resolved.
+    resolved_runs defaults to every pending run of result.
+    """
+    if resolved_runs is None:
+        resolved_runs = result.pending_runs
+    if result.concurrent:
+        outputs, pending_runs = resume_plan_concurrently(result.portia, result.plan, result.outputs, resolved_runs)
+    else:
+        outputs, pending_runs = _plan_run_result(result.portia.resume(resolved_runs[0]))
+    return result._replace(outputs=outputs, pending_runs=pending_runs)
+
+def stream_pipeline(user_prompt: str, poll_interval: float | None = None):
+    """
+    Streaming variant of run_pipeline.
+
+    The plan is run on a background thread and each step output is yielded
+    as soon as it lands on the plan run, so callers can render results
+    without waiting for the whole plan to finish.
+
+    The background thread can't be cancelled. A caller that stops iterating
+    early (e.g. a Streamlit rerun) leaves the plan running to completion.
+
+    Yields:
+        dicts with the step output name, its output and the seconds elapsed
+        since the plan started running, then a last dict with the final state
+        of the plan run, its outstanding clarifications and the seconds
+        elapsed, so callers can tell whether the plan finished
+    """
+    logger.info(f"Streaming pipeline with user prompt: {user_prompt}")
+    if poll_interval is None:
+        poll_interval = get_project_config().performance.stream_poll_interval
+
+    portia = get_portia_instance()
+
+    logger.info("Planning with Portia")
+    plan = portia.plan(user_prompt)
+    logger.info(f"Plan created: {plan}")
+
+    # Create the plan run up front so we can watch its outputs while Portia
+    # mutates it from the worker thread.
+    plan_run = portia.create_plan_run(plan)
+    errors = []
+
+    def _resume():
+        try:
+            portia.resume(plan_run)
+        except Exception as e:
+            errors.append(e)
+
+    start = time.perf_counter()
+    worker = threading.Thread(target=_resume, name="portia-plan-run", daemon=True)
+    worker.start()
+
+    seen = set()
+    while True:
+        finished = not worker.is_alive()
+        # Copy the items before iterating, the worker may add to the dict
+        for name, output in list(plan_run.outputs.step_outputs.items()):
+            if name in seen:
+                continue
+            seen.add(name)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Step output {name} ready after {elapsed:.2f}s")
+            yield {"step": name, "output": output, "elapsed": elapsed}
+        if finished:
+            break
+        worker.join(poll_interval)
+
+    if errors:
+        raise errors[0]
+    logger.info(f"Plan run finished in state {plan_run.state} with {len(seen)} outputs")
+
+    from portia.plan_run import PlanRunState
+
+    clarifications = []
+    if plan_run.state == PlanRunState.NEED_CLARIFICATION:
+        clarifications = plan_run.get_outstanding_clarifications()
+    yield {"state": plan_run.state, "clarifications": clarifications, "elapsed": time.perf_counter() - start}
 
 if __name__ == "__main__":
     # Example usage from command line:
@@ -66,13 +378,15 @@ if __name__ == "__main__":
         user_prompt = "Tell me about the last 10 trades on Uniswap"
 
     logger.info(f"Running main script with prompt: {user_prompt}")
-    outputs = run_pipeline(user_prompt)
+    outputs = run_pipeline(user_prompt).outputs
     logger.info(f"Pipeline outputs: {outputs}")
     print("[DEBUG] Outputs:", outputs)
     
     # Example of using the UniswapTrader
     # Uncomment and modify these values to execute a trade
     """
+    from uniswap_trader import execute_uniswap_trade
+
     from_address = "your-address"
     amount_in = "1000000000000000000"  # 1 ETH in wei
     token_in = "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"  # ETH
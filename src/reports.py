@@ -0,0 +1,251 @@
+"""
+Off-thread rendering of PPTX and PDF reports.
+
+Reports are described by a plain dict spec (title, charts and a table) and
+rendered in a worker process pool, so chart rendering and file assembly
+never block the pipeline or the Streamlit UI. Rendered charts are reused
+across reports, keyed by the hash of their input data, and files are written
+straight to disk. Callers get back the path of the finished file.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Set up logging
+logger = logging.getLogger("uniswap_portia.reports")
+
+REPORT_FORMATS = ("pptx", "pdf")
+
+def is_report_path(value) -> bool:
+    """
+    Return whether a value looks like the path of a rendered report.
+    """
+    return isinstance(value, str) and value.endswith(tuple(f".{fmt}" for fmt in REPORT_FORMATS))
+
+def is_report_file(path, reports_dir: str) -> bool:
+    """
+    Return whether path is an existing report inside reports_dir. Symlinks
+    are resolved first, so nothing outside the directory passes.
+    """
+    if not is_report_path(path):
+        return False
+    reports_dir = os.path.realpath(reports_dir)
+    path = os.path.realpath(path)
+    return os.path.commonpath([path, reports_dir]) == reports_dir and os.path.isfile(path)
+
+def report_still_exists(value) -> bool:
+    """
+    Return False for report paths whose file is gone, so cached tool
+    results pointing at deleted reports are recomputed.
+    """
+    return not is_report_path(value) or os.path.isfile(value)
+
+def spec_key(spec: dict) -> str:
+    """
+    Hash of a chart or report spec, independent of key order.
+    """
+    payload = json.dumps(spec, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _atomic_path(path: str):
+    """
+    Return a temporary path next to path, to be moved over it once complete.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    return tmp_path
+
+def render_chart(chart: dict, charts_dir: str) -> str:
+    """
+    Render a bar chart to PNG, or reuse the one rendered for the same data.
+
+    Args:
+        chart: Dict with title, labels, values and an optional ylabel
+        charts_dir: Directory of the shared chart cache
+    """
+    path = os.path.join(charts_dir, f"{spec_key(chart)}.png")
+    if os.path.exists(path):
+        return path
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    try:
+        ax.bar(chart["labels"], chart["values"], color="#ff007a")
+        ax.set_title(chart["title"])
+        ax.set_ylabel(chart.get("ylabel", ""))
+        ax.tick_params(axis="x", labelrotation=20)
+        fig.tight_layout()
+        tmp_path = _atomic_path(path)
+        fig.savefig(tmp_path, format="png", dpi=150)
+        os.replace(tmp_path, path)
+    finally:
+        plt.close(fig)
+    return path
+
+def _write_pptx(spec: dict, charts: list, path: str):
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[0])
+    slide.shapes.title.text = spec["title"]
+    slide.placeholders[1].text = spec.get("subtitle", "")
+
+    for chart, chart_path in zip(spec.get("charts", []), charts):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = chart["title"]
+        slide.shapes.add_picture(chart_path, Inches(0.5), Inches(1.5), width=Inches(9))
+
+    table = spec.get("table")
+    if table:
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = table.get("title", "Details")
+        rows, cols = len(table["rows"]) + 1, len(table["columns"])
+        shape = slide.shapes.add_table(rows, cols, Inches(0.5), Inches(1.5), Inches(9), Inches(0.4) * rows)
+        for col, name in enumerate(table["columns"]):
+            shape.table.cell(0, col).text = str(name)
+        for row, values in enumerate(table["rows"], start=1):
+            for col, value in enumerate(values):
+                cell = shape.table.cell(row, col)
+                cell.text = str(value)
+                cell.text_frame.paragraphs[0].font.size = Pt(12)
+
+    presentation.save(path)
+
+def _write_pdf(spec: dict, charts: list, path: str):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    # PdfPages writes every page to the file as soon as it is added
+    with PdfPages(path) as pdf:
+        fig = plt.figure(figsize=(11, 8.5))
+        fig.text(0.5, 0.55, spec["title"], ha="center", fontsize=24)
+        fig.text(0.5, 0.45, spec.get("subtitle", ""), ha="center", fontsize=14)
+        pdf.savefig(fig)
+        plt.close(fig)
+
+        for chart_path in charts:
+            fig = plt.figure(figsize=(11, 8.5))
+            ax = fig.add_axes([0, 0, 1, 1])
+            ax.imshow(plt.imread(chart_path))
+            ax.axis("off")
+            pdf.savefig(fig)
+            plt.close(fig)
+
+        table = spec.get("table")
+        if table:
+            fig, ax = plt.subplots(figsize=(11, 8.5))
+            ax.axis("off")
+            ax.set_title(table.get("title", "Details"))
+            ax.table(cellText=[[str(value) for value in row] for row in table["rows"]],
+                     colLabels=table["columns"], loc="center")
+            pdf.savefig(fig)
+            plt.close(fig)
+
+def build_report(spec: dict, fmt: str, path: str, charts_dir: str) -> str:
+    """
+    Render the charts of a report and assemble it at path.
+    Runs in a worker process.
+    """
+    charts = [render_chart(chart, charts_dir) for chart in spec.get("charts", [])]
+    tmp_path = _atomic_path(path)
+    try:
+        if fmt == "pptx":
+            _write_pptx(spec, charts, tmp_path)
+        else:
+            _write_pdf(spec, charts, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+class ReportRenderer:
+    """
+    Render reports on a process pool, skipping reports already on disk.
+
+    Args:
+        reports_dir: Directory the reports and the chart cache are written to
+        max_workers: Number of worker processes
+    """
+    def __init__(self, reports_dir: str, max_workers: int = 2):
+        self.reports_dir = os.path.abspath(reports_dir)
+        self.charts_dir = os.path.join(self.reports_dir, ".charts")
+        os.makedirs(self.charts_dir, exist_ok=True)
+        # Spawn rather than fork, the pipeline and Streamlit run other threads
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def report_path(self, spec: dict, fmt: str) -> str:
+        slug = re.sub(r"[^a-z0-9]+", "-", spec["title"].lower()).strip("-") or "report"
+        return os.path.join(self.reports_dir, f"{slug}-{spec_key({'spec': spec, 'format': fmt})[:16]}.{fmt}")
+
+    def submit(self, spec: dict, fmt: str = "pptx") -> Future:
+        """
+        Start rendering a report and return a future of its path.
+        """
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format '{fmt}'. Available formats: {', '.join(REPORT_FORMATS)}")
+        path = self.report_path(spec, fmt)
+        if os.path.exists(path):
+            logger.info(f"Reusing rendered report {path}")
+            future = Future()
+            future.set_result(path)
+            return future
+        logger.info(f"Rendering report {path}")
+        return self.pool.submit(build_report, spec, fmt, path, self.charts_dir)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_report_renderer() -> ReportRenderer:
+    """
+    Return the process wide report renderer, configured from the performance config.
+    """
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            from config import get_project_config
+
+            performance = get_project_config().performance
+            _renderer = ReportRenderer(performance.reports_dir, max_workers=performance.report_workers)
+        return _renderer
+
+def top_pairs_report(pairs: list, window: str) -> dict:
+    """
+    Build the spec of a report on the top pairs, from SwapAggregator.top_pairs.
+    """
+    labels = [pair.get("label", pair["key"]) for pair in pairs]
+    return {
+        "title": f"Top {len(pairs)} Uniswap pairs",
+        "subtitle": f"Trading volume over the last {window}",
+        "charts": [
+            {"title": f"Volume (USD), last {window}", "labels": labels,
+             "values": [round(pair["volume_usd"], 2) for pair in pairs], "ylabel": "USD"},
+            {"title": f"Number of swaps, last {window}", "labels": labels,
+             "values": [pair["swaps"] for pair in pairs], "ylabel": "Swaps"},
+        ],
+        "table": {
+            "title": "Pair details",
+            "columns": ["Pair", "Volume (USD)", "Swaps", "VWAP"],
+            "rows": [
+                [pair.get("label", pair["key"]), f"{pair['volume_usd']:,.0f}", pair["swaps"],
+                 "n/a" if pair["vwap"] is None else f"{pair['vwap']:.6g}"]
+                for pair in pairs
+            ],
+        },
+    }
@@ -0,0 +1,273 @@
+"""
+Resilient calls to slow or flaky upstreams such as the Enso API.
+
+ResilientCaller wraps a blocking call with a deadline, jittered exponential
+retries for idempotent calls, optional hedged duplicate requests and a
+circuit breaker that fails fast while the upstream is degraded. Only
+transient errors (timeouts, connection errors, HTTP 429 and 5xx) are retried
+and counted by the breaker, any other error is raised straight away.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+# Set up logging
+logger = logging.getLogger("uniswap_portia.resilience")
+
+# Timeouts, refused or reset connections and the network errors raised by
+# urllib and requests all derive from OSError
+TRANSIENT_ERRORS = (OSError,)
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a call does not complete before its deadline.
+    """
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling the upstream while its circuit is open.
+    """
+
+class CircuitBreaker:
+    """
+    Count consecutive failures and open the circuit once they reach
+    failure_threshold. After reset_timeout seconds a single trial call is let
+    through, which closes the circuit again if it succeeds.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Return whether a call may go to the upstream right now.
+        """
+        with self.lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release(self):
+        """
+        End a half open trial without a verdict on the upstream, e.g. after a
+        call failed on an error of our own, so the next call can try again.
+        """
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.opened_at = self.clock()
+            self.trial_in_flight = False
+
+def status_code(error: BaseException) -> int | None:
+    """
+    Return the HTTP status of an error raised for an HTTP response, if any.
+    """
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "status", "code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+class LatencyTracker:
+    """
+    Keep the latencies of the most recent successful calls to estimate the p95.
+    """
+    def __init__(self, window: int = 100, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def p95(self) -> float | None:
+        """
+        Return the 95th percentile latency, or None until enough calls were seen.
+        """
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+def _start(fn, args, kwargs) -> Future:
+    """
+    Run fn on a daemon thread, so a hung upstream call can be abandoned
+    without keeping the process alive.
+    """
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def _target():
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_target, name="resilient-call", daemon=True).start()
+    return future
+
+class ResilientCaller:
+    """
+    Call an upstream with a deadline, retries, hedging and a circuit breaker.
+
+    Args:
+        name: Name of the upstream, used in logs
+        timeout: Overall deadline in seconds for a call, including retries
+        max_retries: Retries for idempotent calls after the first attempt
+        base_delay: Base of the exponential backoff between retries, in seconds
+        max_delay: Maximum backoff between retries, in seconds
+        hedge: Whether idempotent calls send a duplicate request when slow
+        hedge_delay: Seconds to wait before hedging until a p95 latency is known
+        breaker: Circuit breaker shared by every call to this upstream
+        transient_errors: Exception types worth retrying, unless they carry
+            an HTTP status outside transient_statuses
+        transient_statuses: HTTP statuses worth retrying
+    """
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_retries: int = 2,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        hedge: bool = False,
+        hedge_delay: float = 1.0,
+        breaker: CircuitBreaker | None = None,
+        transient_errors: tuple = TRANSIENT_ERRORS,
+        transient_statuses: frozenset = TRANSIENT_STATUSES,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.transient_errors = transient_errors
+        self.transient_statuses = transient_statuses
+        self.latency = LatencyTracker()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full jitter exponential backoff before the given retry attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def is_transient(self, error: BaseException) -> bool:
+        """
+        Return whether an error is likely to go away on a retry.
+        """
+        status = status_code(error)
+        if status is not None:
+            return status in self.transient_statuses
+        return isinstance(error, self.transient_errors)
+
+    def call(self, fn, *args, idempotent: bool = True, **kwargs):
+        """
+        Call fn(*args, **kwargs) through the resilience policies.
+
+        Only idempotent calls are retried or hedged, and only on transient
+        errors. A call that is not idempotent still gets the deadline and the
+        circuit breaker, but a timed out call may still complete upstream.
+
+        Raises:
+            CircuitOpenError: if the upstream circuit is open
+            DeadlineExceeded: if the call did not finish before the deadline
+        """
+        deadline = time.monotonic() + self.timeout
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        last_error = None
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} circuit is open, failing fast") from last_error
+            started = time.monotonic()
+            try:
+                result = self._attempt(fn, args, kwargs, deadline, hedge=self.hedge and idempotent)
+            except Exception as e:
+                if not self.is_transient(e):
+                    # Not a sign of a degraded upstream, but not proof it recovered either
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                remaining = deadline - time.monotonic()
+                logger.warning(f"{self.name} attempt {attempt + 1}/{attempts} failed: {e}")
+                if isinstance(e, DeadlineExceeded) or attempt + 1 == attempts or remaining <= 0:
+                    if not idempotent and isinstance(e, DeadlineExceeded):
+                        logger.warning(f"{self.name} call timed out but may still complete upstream")
+                    raise
+                time.sleep(min(self.backoff(attempt), remaining))
+                continue
+            self.breaker.record_success()
+            self.latency.record(time.monotonic() - started)
+            return result
+
+    def _attempt(self, fn, args, kwargs, deadline, hedge):
+        """
+        Make one attempt, hedging with a duplicate request when the first one
+        is slower than the observed p95.
+        """
+        pending = {_start(fn, args, kwargs)}
+        if hedge:
+            hedge_after = self.latency.p95() or self.hedge_delay
+            done, _ = wait(pending, timeout=max(0.0, min(hedge_after, deadline - time.monotonic())))
+            if not done and time.monotonic() < deadline:
+                logger.info(f"{self.name} call slower than {hedge_after:.2f}s, sending hedged request")
+                pending.add(_start(fn, args, kwargs))
+
+        error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        if pending:
+            raise DeadlineExceeded(f"{self.name} call did not finish within {self.timeout}s")
+        raise error
@@ -8,13 +8,14 @@ import logging
 import sys
 import json
 from io import StringIO
-from dotenv import load_dotenv
-from main import run_pipeline
-from uniswap_trader import get_uniswap_trader, execute_uniswap_trade
+from config import get_project_config, load_env
+from main import stream_pipeline
+from reports import is_report_file
+from uniswap_trader import get_enso_caller, get_uniswap_trader, execute_uniswap_trade
 from eth_utils import to_checksum_address, to_normalized_address
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +52,42 @@ COMMON_TOKENS = {
     "WETH": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2",  # All lowercase for WETH
 }
 
+def render_report_download(output):
+    """
+    Offer a download button when a step output is the path of a report
+    rendered into the reports directory. Any other path is ignored, step
+    outputs come from the LLM and must not expose arbitrary files.
+    """
+    value = getattr(output, "value", output)
+    if not is_report_file(value, get_project_config().performance.reports_dir):
+        return
+    mime = "application/pdf" if value.endswith(".pdf") else (
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    )
+    with open(value, "rb") as report_file:
+        st.download_button(
+            label=f"Download {os.path.basename(value)}",
+            data=report_file,
+            file_name=os.path.basename(value),
+            mime=mime,
+        )
+
+def render_plan_run_state(final):
+    """
+    Show whether the streamed plan run completed, failed or is waiting on
+    clarifications.
+    """
+    state = getattr(final["state"], "value", final["state"])
+    logger.info(f"Plan run ended in state {state}")
+    if state == "COMPLETE":
+        st.success(f"Plan completed in {final['elapsed']:.1f}s")
+    elif state == "NEED_CLARIFICATION":
+        st.warning("The plan stopped to ask for clarification:")
+        for clarification in final["clarifications"]:
+            st.write(getattr(clarification, "user_guidance", clarification))
+    else:
+        st.error(f"The plan did not finish, it ended in state {state}")
+
 def main():
     st.title("Uniswap Portia Demo")
     
@@ -63,9 +100,18 @@ def main():
         user_prompt = st.text_area("Ask about Uniswap data:")
         if st.button("Submit Query"):
             logger.info(f"User submitted query: {user_prompt}")
-            result = run_pipeline(user_prompt)
-            logger.info(f"Query result: {result}")
-            st.write("Plan Run Output:", result)
+            st.write("Plan Run Output:")
+            # Render each step as soon as it completes instead of waiting
+            # for the whole plan run
+            with st.spinner("Running plan..."):
+                for step in stream_pipeline(user_prompt):
+                    if "state" in step:
+                        render_plan_run_state(step)
+                        continue
+                    logger.info(f"Query step result: {step}")
+                    st.markdown(f"**{step['step']}** ({step['elapsed']:.1f}s)")
+                    st.write(step["output"])
+                    render_report_download(step["output"])
     
     # Tab 2: Execute Trades
     with tab2:
@@ -114,6 +160,7 @@ def main():
                 try:
                     logger.info(f"Getting optimal route for {amount_in} {token_in_option} to {token_out_option}")
                     trader = get_uniswap_trader()
+                    project_config = get_project_config()
                     
                     # Format parameters correctly for the Enso API
                     # 1. fromAddress must be a single Ethereum address (checksummed)
@@ -134,7 +181,7 @@ def main():
                     
                     # Create the exact JSON structure that will be sent to Enso
                     request_data = {
-                        "chainId": 1,
+                        "chainId": project_config.chain_id,
                         "fromAddress": formatted_from_address,
                         "routingStrategy": "router",
                         "receiver": formatted_from_address,
@@ -142,7 +189,7 @@ def main():
                         "amountIn": formatted_amount_in,
                         "tokenIn": formatted_token_in,
                         "tokenOut": formatted_token_out,
-                        "slippage": "50",
+                        "slippage": str(project_config.slippage_bps),
                         "variableEstimates": None
                     }
                     
@@ -153,11 +200,12 @@ def main():
                     logger.info(f"  token_in: {formatted_token_in}")
                     logger.info(f"  token_out: {formatted_token_out}")
                     
-                    # Log the final JSON being sent to Enso
-                    logger.info(f"FINAL JSON to Enso:\n{json.dumps(request_data, indent=2)}")
+                    # Log the request for reference, the SDK builds the actual Enso request
+                    logger.info(f"Informational request JSON (the SDK builds the actual Enso request):\n{json.dumps(request_data, indent=2)}")
                     
                     # Call the API with the correctly formatted parameters
-                    route_response = trader.get_optimal_route(
+                    route_response = get_enso_caller().call(
+                        trader.get_optimal_route,
                         from_address=formatted_from_address,
                         amount_in=formatted_amount_in,
                         token_in=formatted_token_in,
@@ -210,7 +258,9 @@ def main():
                         with st.spinner("Executing trade..."):
                             try:
                                 logger.info(f"Executing trade for {amount_in} {token_in_option} to {token_out_option}")
-                                tx_hash = trader.execute_trade(route_response)
+                                tx_hash = get_enso_caller().call(
+                                    trader.execute_trade, route_response, idempotent=False
+                                )
                                 logger.info(f"Trade executed successfully with tx hash: {tx_hash}")
                                 st.success(f"Trade executed successfully! Transaction hash: {tx_hash}")
                             except Exception as e:
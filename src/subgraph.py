@@ -0,0 +1,126 @@
+"""
+Shared HTTP session and helpers for querying the Uniswap subgraph.
+"""
+
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import get_project_config
+
+# Set up logging
+logger = logging.getLogger("uniswap_portia.subgraph")
+
+# Last known indexed block, refreshed in the background at most every
+# freshness_poll_interval seconds
+_latest_block = {"number": None, "checked_at": None, "refreshing": False}
+_latest_block_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def get_http_session() -> requests.Session:
+    """
+    Return a process wide requests session sized from the performance config.
+    GraphQL queries are idempotent, so POSTs are retried as well.
+    """
+    performance = get_project_config().performance
+    retry = Retry(
+        total=performance.max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "POST"),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=performance.http_pool_connections,
+        pool_maxsize=performance.http_pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    logger.info(
+        f"HTTP session created with {performance.http_pool_connections} pools "
+        f"of {performance.http_pool_maxsize} connections"
+    )
+    return session
+
+@lru_cache(maxsize=None)
+def get_single_attempt_session() -> requests.Session:
+    """
+    Return a session that never retries, for quick checks that are better
+    skipped than waited on.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def query_subgraph(
+    query: str,
+    variables: dict | None = None,
+    endpoint: str | None = None,
+    session: requests.Session | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """
+    Run a GraphQL query against the Uniswap subgraph and return its data.
+    Uses the shared retrying session and request_timeout unless given others.
+
+    Raises:
+        RuntimeError: if the subgraph returns GraphQL errors
+    """
+    config = get_project_config()
+    endpoint = endpoint or config.uniswap_endpoint
+    response = (session or get_http_session()).post(
+        endpoint,
+        json={"query": query, "variables": variables or {}},
+        timeout=timeout or config.performance.request_timeout,
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("errors"):
+        raise RuntimeError(f"Subgraph query failed: {payload['errors']}")
+    return payload["data"]
+
+def _refresh_latest_block(timeout: float):
+    try:
+        data = query_subgraph("{ _meta { block { number } } }", session=get_single_attempt_session(), timeout=timeout)
+        number = int(data["_meta"]["block"]["number"])
+    except Exception as e:
+        logger.warning(f"Could not fetch the latest indexed block: {e}")
+        number = None
+    with _latest_block_lock:
+        if number is not None:
+            _latest_block["number"] = number
+        _latest_block["checked_at"] = time.monotonic()
+        _latest_block["refreshing"] = False
+
+def get_latest_indexed_block() -> int | None:
+    """
+    Return the last known block indexed by the subgraph, or None if it is
+    unknown yet.
+
+    This never waits on the subgraph, every tool call asks for it. Once the
+    value is freshness_poll_interval seconds old a single background thread
+    refreshes it with one short request, callers keep getting the last known
+    value meanwhile.
+    """
+    config = get_project_config()
+    if not config.uniswap_endpoint:
+        return None
+    performance = config.performance
+    with _latest_block_lock:
+        checked_at = _latest_block["checked_at"]
+        stale = checked_at is None or time.monotonic() - checked_at >= performance.freshness_poll_interval
+        if stale and not _latest_block["refreshing"]:
+            _latest_block["refreshing"] = True
+            threading.Thread(
+                target=_refresh_latest_block, args=(performance.freshness_timeout,),
+                name="latest-block-refresh", daemon=True,
+            ).start()
+        return _latest_block["number"]
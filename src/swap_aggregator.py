@@ -0,0 +1,357 @@
+"""
+Live rolling-window aggregates of Uniswap swaps.
+
+SwapIngestLoop polls the subgraph for new swaps and feeds them to a
+SwapAggregator, which keeps volume, swap count and VWAP per token and per
+pair over the last 1h, 24h and 7d. Tokens are keyed by contract address,
+as anyone can deploy a token with a well known symbol, and symbols are only
+mapped to addresses at query time. Each window is a ring buffer of time
+buckets, so adding a swap is O(1) and memory is bounded by the number of
+buckets and tracked keys, however many swaps are ingested.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger("uniswap_portia.aggregator")
+
+# Window name -> (span in seconds, number of buckets)
+WINDOWS = {
+    "1h": (3600, 60),
+    "24h": (86400, 96),
+    "7d": (604800, 168),
+}
+
+class RollingWindow:
+    """
+    Ring buffer of time buckets covering the last span seconds.
+
+    Every bucket keeps the USD volume, the number of swaps and the notional
+    and amount sums used for the VWAP (notional / amount).
+    """
+    __slots__ = ("bucket_seconds", "size", "head", "volume", "count", "notional", "amount")
+
+    def __init__(self, span: int, buckets: int):
+        self.bucket_seconds = span // buckets
+        self.size = buckets
+        self.head = None
+        self.volume = [0.0] * buckets
+        self.count = [0] * buckets
+        self.notional = [0.0] * buckets
+        self.amount = [0.0] * buckets
+
+    def advance(self, timestamp: float):
+        """
+        Move the head of the window to timestamp, clearing expired buckets.
+        """
+        bucket = int(timestamp // self.bucket_seconds)
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        for offset in range(1, min(bucket - self.head, self.size) + 1):
+            slot = (self.head + offset) % self.size
+            self.volume[slot] = 0.0
+            self.count[slot] = 0
+            self.notional[slot] = 0.0
+            self.amount[slot] = 0.0
+        self.head = bucket
+
+    def add(self, timestamp: float, volume: float, notional: float, amount: float):
+        self.advance(timestamp)
+        bucket = int(timestamp // self.bucket_seconds)
+        if bucket <= self.head - self.size:
+            # Older than the whole window
+            return
+        slot = bucket % self.size
+        self.volume[slot] += volume
+        self.count[slot] += 1
+        self.notional[slot] += notional
+        self.amount[slot] += amount
+
+    def totals(self) -> dict:
+        amount = sum(self.amount)
+        return {
+            "volume_usd": sum(self.volume),
+            "swaps": sum(self.count),
+            "vwap": sum(self.notional) / amount if amount else None,
+        }
+
+class SwapAggregator:
+    """
+    Rolling 1h/24h/7d aggregates per token address and per pair, keyed
+    "<token0 address>/<token1 address>".
+
+    Token VWAPs are in USD, pair VWAPs are the price of the first token in
+    units of the second. At most max_keys tokens and pairs are tracked, the
+    least recently traded ones are dropped first.
+    """
+    def __init__(self, max_keys: int = 2048):
+        self.max_keys = max_keys
+        self.series = OrderedDict()
+        # Address -> symbol of every tracked token, symbol -> addresses
+        self.token_symbols = {}
+        self.symbol_addresses = {}
+        self.lock = threading.Lock()
+        self.latest_timestamp = None
+        self.latest_block = None
+
+    def _windows(self, key):
+        windows = self.series.get(key)
+        if windows is None:
+            windows = {name: RollingWindow(span, buckets) for name, (span, buckets) in WINDOWS.items()}
+            self.series[key] = windows
+            if len(self.series) > self.max_keys:
+                evicted, _ = self.series.popitem(last=False)
+                self._forget_symbol(evicted)
+        else:
+            self.series.move_to_end(key)
+        return windows
+
+    def _remember_symbol(self, address, symbol):
+        if self.token_symbols.get(address) == symbol:
+            return
+        self._forget_symbol(address)
+        self.token_symbols[address] = symbol
+        self.symbol_addresses.setdefault(symbol, set()).add(address)
+
+    def _forget_symbol(self, address):
+        symbol = self.token_symbols.pop(address, None)
+        if symbol is not None:
+            self.symbol_addresses[symbol].discard(address)
+            if not self.symbol_addresses[symbol]:
+                del self.symbol_addresses[symbol]
+
+    def _add(self, key, timestamp, volume, notional, amount):
+        for window in self._windows(key).values():
+            window.add(timestamp, volume, notional, amount)
+
+    def add_swap(self, swap: dict):
+        """
+        Add a swap in the subgraph's format to the aggregates.
+        """
+        timestamp = int(swap["timestamp"])
+        volume = abs(float(swap["amountUSD"]))
+        token0 = swap["token0"]["id"].lower()
+        token1 = swap["token1"]["id"].lower()
+        amount0 = abs(float(swap["amount0"]))
+        amount1 = abs(float(swap["amount1"]))
+
+        with self.lock:
+            self._add(token0, timestamp, volume, volume, amount0)
+            self._add(token1, timestamp, volume, volume, amount1)
+            self._add(f"{token0}/{token1}", timestamp, volume, amount1, amount0)
+            self._remember_symbol(token0, swap["token0"]["symbol"].upper())
+            self._remember_symbol(token1, swap["token1"]["symbol"].upper())
+            if self.latest_timestamp is None or timestamp > self.latest_timestamp:
+                self.latest_timestamp = timestamp
+            block = swap.get("transaction", {}).get("blockNumber")
+            if block is not None and (self.latest_block is None or int(block) > self.latest_block):
+                self.latest_block = int(block)
+
+    def addresses(self, symbol: str) -> list:
+        """
+        Return the addresses of the tracked tokens using a symbol. There can
+        be several, only one of them is the token the symbol is known for.
+        """
+        with self.lock:
+            return sorted(self.symbol_addresses.get(symbol.upper(), ()))
+
+    def label(self, key: str) -> str:
+        """
+        Return the symbols of a token or pair key, for display.
+        """
+        return "/".join(self.token_symbols.get(address, address) for address in key.split("/"))
+
+    def stats(self, key: str, window: str = "24h", now: float | None = None) -> dict | None:
+        """
+        Return volume_usd, swaps and vwap for a token address or a pair of
+        addresses "<address>/<address>" (either order), or None if the key
+        was never traded.
+
+        now defaults to the latest swap seen, which suits replaying recorded
+        swaps. Live callers should pass the wall clock, so windows keep
+        moving when no swaps come in.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window '{window}'. Available windows: {', '.join(WINDOWS)}")
+        with self.lock:
+            return self._stats(key.lower(), window, now)
+
+    def _stats(self, key, window, now):
+        # Callers hold the lock
+        inverted = False
+        windows = self.series.get(key)
+        if windows is None and "/" in key:
+            base, quote = key.split("/", 1)
+            windows = self.series.get(f"{quote}/{base}")
+            inverted = True
+        if windows is None:
+            return None
+        rolling = windows[window]
+        rolling.advance(now if now is not None else (self.latest_timestamp or time.time()))
+        totals = rolling.totals()
+        if inverted and totals["vwap"]:
+            totals["vwap"] = 1 / totals["vwap"]
+        return {"key": key, "label": self.label(key), "window": window, **totals}
+
+    def top_pairs(self, window: str = "24h", limit: int = 5, now: float | None = None) -> list:
+        """
+        Return the stats of the pairs with the most volume in the window.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window '{window}'. Available windows: {', '.join(WINDOWS)}")
+        # One lock hold, so the ingest thread can't evict a pair halfway
+        with self.lock:
+            ranked = [self._stats(key, window, now) for key in self.series if "/" in key]
+        ranked.sort(key=lambda stats: stats["volume_usd"], reverse=True)
+        return ranked[:limit]
+
+def replay(aggregator: SwapAggregator, swaps) -> SwapAggregator:
+    """
+    Feed recorded swaps to an aggregator in timestamp order.
+    """
+    for swap in sorted(swaps, key=lambda swap: int(swap["timestamp"])):
+        aggregator.add_swap(swap)
+    return aggregator
+
+def load_swaps(path: str) -> list:
+    """
+    Load swaps recorded from the subgraph as a JSON list.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+SWAPS_QUERY = """
+query Swaps($since: BigInt!, $first: Int!, $skip: Int!) {
+  swaps(where: {timestamp_gte: $since}, orderBy: timestamp, orderDirection: asc, first: $first, skip: $skip) {
+    id
+    timestamp
+    amountUSD
+    amount0
+    amount1
+    sqrtPriceX96
+    tick
+    token0 { id symbol decimals }
+    token1 { id symbol decimals }
+    pool { id feeTier }
+    transaction { blockNumber }
+  }
+}
+"""
+
+def fetch_subgraph_swaps(since: int, first: int, skip: int = 0) -> list:
+    """
+    Fetch up to first swaps with a timestamp of at least since from the
+    subgraph, after skipping the first skip of them. The subgraph breaks
+    timestamp ties by id, so the order is stable across requests.
+    """
+    from subgraph import query_subgraph
+
+    return query_subgraph(SWAPS_QUERY, {"since": str(since), "first": first, "skip": skip})["swaps"]
+
+class SwapIngestLoop:
+    """
+    Background loop polling for new swaps and feeding them to an aggregator.
+
+    Args:
+        aggregator: The aggregator to update
+        fetch_swaps: Callable(since, first, skip) returning swaps ordered by
+            timestamp, then id
+        poll_interval: Seconds between polls
+        batch_size: Maximum number of swaps fetched per request
+        backfill_seconds: How far back to start ingesting from
+    """
+    def __init__(
+        self,
+        aggregator: SwapAggregator,
+        fetch_swaps=fetch_subgraph_swaps,
+        poll_interval: float = 15.0,
+        batch_size: int = 1000,
+        backfill_seconds: float = 3600,
+    ):
+        self.aggregator = aggregator
+        self.fetch_swaps = fetch_swaps
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.since = int(time.time() - backfill_seconds)
+        # Ids already ingested at the `since` timestamp, the query is inclusive
+        self.seen_at_since = set()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def poll_once(self) -> int:
+        """
+        Ingest every swap newer than the last poll and return how many were added.
+        """
+        added = 0
+        while True:
+            # Skip the swaps already ingested at `since`, so a timestamp with
+            # more swaps than a page is paged through rather than refetched
+            swaps = self.fetch_swaps(self.since, self.batch_size, len(self.seen_at_since))
+            new_swaps = [swap for swap in swaps if swap["id"] not in self.seen_at_since]
+            for swap in new_swaps:
+                self.aggregator.add_swap(swap)
+                timestamp = int(swap["timestamp"])
+                if timestamp > self.since:
+                    self.since = timestamp
+                    self.seen_at_since = set()
+                self.seen_at_since.add(swap["id"])
+            added += len(new_swaps)
+            # A full page may have more swaps behind it. A full page of swaps
+            # already seen means the subgraph's order changed, try next poll
+            if len(swaps) < self.batch_size or not new_swaps:
+                return added
+
+    def run(self):
+        logger.info(f"Swap ingest loop started from timestamp {self.since}")
+        while not self.stop_event.is_set():
+            try:
+                added = self.poll_once()
+                if added:
+                    logger.info(f"Ingested {added} swaps up to timestamp {self.since}")
+            except Exception as e:
+                logger.warning(f"Swap ingest poll failed: {e}")
+            self.stop_event.wait(self.poll_interval)
+        logger.info("Swap ingest loop stopped")
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="swap-ingest", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+_live_aggregator = None
+_live_lock = threading.Lock()
+
+def get_live_aggregator() -> SwapAggregator | None:
+    """
+    Return the aggregator fed by the live ingest loop, or None if it isn't running.
+    """
+    return _live_aggregator
+
+def start_live_ingest(poll_interval: float, batch_size: int, backfill_seconds: float, max_keys: int) -> SwapAggregator:
+    """
+    Start the process wide ingest loop, once, and return its aggregator.
+    """
+    global _live_aggregator
+    with _live_lock:
+        if _live_aggregator is None:
+            aggregator = SwapAggregator(max_keys=max_keys)
+            SwapIngestLoop(
+                aggregator,
+                poll_interval=poll_interval,
+                batch_size=batch_size,
+                backfill_seconds=backfill_seconds,
+            ).start()
+            _live_aggregator = aggregator
+        return _live_aggregator
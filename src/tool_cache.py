@@ -0,0 +1,247 @@
+"""
+Result cache for Portia tool invocations.
+
+Results are keyed by tool id, the canonicalized tool arguments and a data
+freshness token (the latest indexed block of the subgraph), so a cached
+answer is reused until new data is indexed or its TTL runs out.
+
+The on-disk tier stores JSON, so a shared cache directory can never run
+code in the processes reading it. Results that don't survive a JSON round
+trip are only cached in memory.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from portia.tool import Tool, ToolRunContext
+from pydantic import PrivateAttr, ValidationError
+
+# Set up logging
+logger = logging.getLogger("uniswap_portia.cache")
+
+def canonical_key(tool_id: str, arguments: dict, freshness=None) -> str:
+    """
+    Build a stable cache key, independent of argument order.
+    """
+    payload = json.dumps(
+        {"tool": tool_id, "arguments": arguments, "freshness": freshness},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ToolResultCache:
+    """
+    Size bounded LRU cache of tool results with an optional on-disk tier.
+
+    Args:
+        max_entries: Maximum number of results kept in memory
+        default_ttl: Seconds a result stays valid, 0 disables caching
+        ttl_policies: Per tool id TTLs overriding default_ttl
+        cache_dir: Directory of the on-disk tier shared between processes
+        clock: Wall clock, the disk tier is shared so it can't be monotonic
+    """
+    def __init__(
+        self,
+        max_entries: int = 256,
+        default_ttl: float = 30.0,
+        ttl_policies: dict | None = None,
+        cache_dir: str | None = None,
+        clock=time.time,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttl_policies = dict(ttl_policies or {})
+        self.cache_dir = cache_dir
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def ttl_for(self, tool_id: str) -> float:
+        return self.ttl_policies.get(tool_id, self.default_ttl)
+
+    def get_or_compute(self, tool_id: str, arguments: dict, freshness, compute, valid=None):
+        """
+        Return the cached result for this call, or compute and cache it.
+        A cached result for which valid(result) is False is recomputed, e.g.
+        the path of a file that was deleted since.
+
+        Concurrent callers asking for the same key wait for the first one
+        instead of all computing the result (stampede protection). Errors are
+        passed on to every waiting caller and never cached.
+        """
+        ttl = self.ttl_for(tool_id)
+        key = canonical_key(tool_id, arguments, freshness)
+
+        with self.lock:
+            found, value = self._get_memory(key)
+            if found and (valid is None or valid(value)):
+                self.hits += 1
+                return value
+            owner = key not in self.inflight
+            if owner:
+                self.inflight[key] = Future()
+            future = self.inflight[key]
+
+        if not owner:
+            logger.debug(f"Waiting for in-flight {tool_id} call")
+            return future.result()
+
+        try:
+            entry = self._get_disk(key) if ttl > 0 else None
+            if entry is not None and (valid is None or valid(entry[0])):
+                value, expires_at = entry
+                with self.lock:
+                    self.hits += 1
+                    self._put_memory(key, value, expires_at)
+            else:
+                with self.lock:
+                    self.misses += 1
+                value = compute()
+                if ttl > 0:
+                    expires_at = self.clock() + ttl
+                    with self.lock:
+                        self._put_memory(key, value, expires_at)
+                    self._put_disk(key, value, expires_at)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def _get_memory(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at <= self.clock():
+            del self.entries[key]
+            return False, None
+        self.entries.move_to_end(key)
+        return True, value
+
+    def _put_memory(self, key, value, expires_at):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _get_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key)) as f:
+                entry = json.load(f)
+            value, expires_at = entry["value"], float(entry["expires_at"])
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        if expires_at <= self.clock():
+            return None
+        return value, expires_at
+
+    def _put_disk(self, key, value, expires_at):
+        if not self.cache_dir:
+            return
+        try:
+            payload = json.dumps({"value": value, "expires_at": expires_at})
+        except (TypeError, ValueError):
+            return
+        if json.loads(payload)["value"] != value:
+            # e.g. tuples would come back as lists
+            return
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            logger.warning(f"Could not write cache entry to disk: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+class CachedTool(Tool):
+    """
+    Wrap a tool so its results are served from a ToolResultCache.
+    Build it with with_cache rather than directly.
+    """
+    tool: Tool
+    _cache: ToolResultCache = PrivateAttr()
+    _freshness = PrivateAttr(default=None)
+    _valid = PrivateAttr(default=None)
+
+    def arguments(self, ctx: ToolRunContext, *args, **kwargs) -> dict:
+        """
+        Return the arguments of a call by name, defaults filled in and
+        normalized through the args schema, so calls asking the same thing
+        share a cache entry however they were made.
+        """
+        bound = inspect.signature(self.tool.run).bind(ctx, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(list(bound.arguments.items())[1:])
+        try:
+            return self.tool.args_schema(**arguments).model_dump()
+        except ValidationError:
+            # Let the tool report invalid arguments itself
+            return arguments
+
+    def run(self, ctx: ToolRunContext, *args, **kwargs):
+        freshness = self._freshness() if self._freshness else None
+        return self._cache.get_or_compute(
+            self.tool.id,
+            self.arguments(ctx, *args, **kwargs),
+            freshness,
+            lambda: self.tool.run(ctx, *args, **kwargs),
+            self._valid,
+        )
+
+def with_cache(tool: Tool, cache: ToolResultCache, freshness=None, valid=None) -> CachedTool:
+    """
+    Return a CachedTool exposing the same id, description and schemas as tool.
+
+    Args:
+        tool: The tool to wrap
+        cache: The cache to store results in, usually shared across tools
+        freshness: Optional callable returning the current data freshness
+            token, e.g. the latest indexed block
+        valid: Optional callable telling whether a cached result can still
+            be served
+    """
+    cached = CachedTool(
+        tool=tool,
+        id=tool.id,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        output_schema=tool.output_schema,
+    )
+    cached._cache = cache
+    cached._freshness = freshness
+    cached._valid = valid
+    return cached
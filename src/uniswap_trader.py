@@ -5,37 +5,61 @@ UniswapTrader module for interacting with Uniswap and executing trades.
 import os
 import logging
 import json
-from dotenv import load_dotenv
+from functools import lru_cache
 from portia.config import Config
 from portia.trading.uniswap import UniswapTrader
 from eth_utils import to_checksum_address, to_normalized_address
+from config import get_project_config, load_env
+from resilience import CircuitBreaker, ResilientCaller
 
 # Set up logging
 logger = logging.getLogger("uniswap_portia.trader")
 
-load_dotenv()
+load_env()
 
 def get_uniswap_trader():
     """
     Set up a UniswapTrader instance with the project configuration.
     """
     logger.info("Initializing UniswapTrader")
+    project_config = get_project_config()
     
     # Create a configuration
     config = Config.from_default(
         llm_provider="OPENAI",
-        openai_api_key=os.getenv("OPENAI_API_KEY", "")
+        openai_api_key=project_config.openai_api_key.get_secret_value()
     )
     
     # Create a UniswapTrader instance
     trader = UniswapTrader(
         config=config,
-        enso_api_key=os.getenv("ENSO_API_KEY", "")
+        enso_api_key=project_config.enso_api_key.get_secret_value()
     )
     
     logger.info("UniswapTrader initialized successfully")
     return trader
 
+@lru_cache(maxsize=None)
+def get_enso_caller():
+    """
+    Return the process wide ResilientCaller guarding calls to the Enso API.
+    Quotes and trades share it, so a degraded Enso trips one circuit for both.
+    """
+    performance = get_project_config().performance
+    return ResilientCaller(
+        name="enso",
+        timeout=performance.request_timeout,
+        max_retries=performance.max_retries,
+        base_delay=performance.retry_base_delay,
+        max_delay=performance.retry_max_delay,
+        hedge=performance.hedge_requests,
+        hedge_delay=performance.hedge_delay,
+        breaker=CircuitBreaker(
+            failure_threshold=performance.circuit_failure_threshold,
+            reset_timeout=performance.circuit_reset_timeout,
+        ),
+    )
+
 def execute_uniswap_trade(from_address, amount_in, token_in, token_out):
     """
     Execute a trade on Uniswap using the UniswapTrader.
@@ -53,6 +77,7 @@ def execute_uniswap_trade(from_address, amount_in, token_in, token_out):
     logger.info(f"Token in: {token_in}, Token out: {token_out}")
     
     trader = get_uniswap_trader()
+    project_config = get_project_config()
     
     # Format parameters correctly for the Enso API
     # 1. fromAddress must be a single Ethereum address (checksummed)
@@ -73,7 +98,7 @@ def execute_uniswap_trade(from_address, amount_in, token_in, token_out):
     
     # Create the exact JSON structure that will be sent to Enso
     request_data = {
-        "chainId": 1,
+        "chainId": project_config.chain_id,
         "fromAddress": formatted_from_address,
         "routingStrategy": "router",
         "receiver": formatted_from_address,
@@ -81,7 +106,7 @@ def execute_uniswap_trade(from_address, amount_in, token_in, token_out):
         "amountIn": formatted_amount_in,
         "tokenIn": formatted_token_in,
         "tokenOut": formatted_token_out,
-        "slippage": "50",
+        "slippage": str(project_config.slippage_bps),
         "variableEstimates": None
     }
     
@@ -92,12 +117,15 @@ def execute_uniswap_trade(from_address, amount_in, token_in, token_out):
     logger.info(f"  token_in: {formatted_token_in}")
     logger.info(f"  token_out: {formatted_token_out}")
     
-    # Log the final JSON being sent to Enso
-    logger.info(f"FINAL JSON to Enso:\n{json.dumps(request_data, indent=2)}")
+    # Log the request for reference, the SDK builds the actual Enso request
+    logger.info(f"Informational request JSON (the SDK builds the actual Enso request):\n{json.dumps(request_data, indent=2)}")
     
     logger.info("Getting optimal route")
-    # Call the API with the correctly formatted parameters
-    route_response = trader.get_optimal_route(
+    # Call the API with the correctly formatted parameters.
+    # Quotes are idempotent, so they are retried and hedged when slow.
+    enso = get_enso_caller()
+    route_response = enso.call(
+        trader.get_optimal_route,
         from_address=formatted_from_address,
         amount_in=formatted_amount_in,
         token_in=formatted_token_in,
@@ -126,7 +154,8 @@ def execute_uniswap_trade(from_address, amount_in, token_in, token_out):
     logger.info(f"Price impact: {route_response['price_impact']}%")
     
     logger.info("Executing trade")
-    tx_hash = trader.execute_trade(route_response)
+    # Never retry the trade itself, a timed out trade may still go through
+    tx_hash = enso.call(trader.execute_trade, route_response, idempotent=False)
     logger.info(f"Trade executed with transaction hash: {tx_hash}")
     
     return tx_hash
@@ -140,6 +169,7 @@ if __name__ == "__main__":
     
     # Get the optimal route
     trader = get_uniswap_trader()
+    project_config = get_project_config()
     
     # Format parameters correctly for the Enso API
     # 1. fromAddress must be a single Ethereum address (checksummed)
@@ -160,7 +190,7 @@ if __name__ == "__main__":
     
     # Create the exact JSON structure that will be sent to Enso
     request_data = {
-        "chainId": 1,
+        "chainId": project_config.chain_id,
         "fromAddress": formatted_from_address,
         "routingStrategy": "router",
         "receiver": formatted_from_address,
@@ -168,15 +198,17 @@ if __name__ == "__main__":
         "amountIn": formatted_amount_in,
         "tokenIn": formatted_token_in,
         "tokenOut": formatted_token_out,
-        "slippage": "50",
+        "slippage": str(project_config.slippage_bps),
         "variableEstimates": None
     }
     
-    # Log the final JSON being sent to Enso
-    logger.info(f"FINAL JSON to Enso:\n{json.dumps(request_data, indent=2)}")
+    # Log the request for reference, the SDK builds the actual Enso request
+    logger.info(f"Informational request JSON (the SDK builds the actual Enso request):\n{json.dumps(request_data, indent=2)}")
     
     # Call the API with the correctly formatted parameters
-    route_response = trader.get_optimal_route(
+    enso = get_enso_caller()
+    route_response = enso.call(
+        trader.get_optimal_route,
         from_address=formatted_from_address,
         amount_in=formatted_amount_in,
         token_in=formatted_token_in,
@@ -214,7 +246,7 @@ if __name__ == "__main__":
     if confirm.lower() == 'y':
         # Execute the trade
         print("Executing trade...")
-        tx_hash = trader.execute_trade(route_response)
+        tx_hash = enso.call(trader.execute_trade, route_response, idempotent=False)
         print(f"Trade executed with transaction hash: {tx_hash}")
     else:
         print("Trade cancelled.") 
\ No newline at end of file
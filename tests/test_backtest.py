@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+from src.backtest import parameter_grid, pool_ids, pool_states, run_backtest, simulate, swap_output
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "synthetic_swaps.json")
+
+@pytest.fixture
+def swaps():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def test_swap_output_matches_hand_computed_v3_values():
+    # sqrt price 2 (price 4) and liquidity 1000. Selling 100 token0 moves
+    # 1/sqrt(P) from 0.5 to 0.6, so the output is 1000 * (2 - 1 / 0.6)
+    assert swap_output(2.0, 1000.0, 100.0, 0.0, zero_for_one=True) == pytest.approx(1000 / 3)
+    # Selling 100 token1 moves sqrt(P) from 2 to 2.1, so the output is 1000 * (1 / 2 - 1 / 2.1)
+    assert swap_output(2.0, 1000.0, 100.0, 0.0, zero_for_one=False) == pytest.approx(1000 / 42)
+    # The 0.3% fee is taken from the input, 99.7 is swapped: 1000 * (2 - 1 / 0.5997)
+    assert swap_output(2.0, 1000.0, 100.0, 0.003, zero_for_one=True) == pytest.approx(332.49958312)
+
+def test_liquidity_comes_from_each_swap_or_its_hour(swaps):
+    pool_id = pool_ids(swaps)[0]
+    rows = sorted((swap for swap in swaps if swap["pool"]["id"] == pool_id), key=lambda swap: int(swap["timestamp"]))
+    rows[0] = dict(rows[0], liquidity="123")
+    assert pool_states(rows, pool_id)["liquidity"][0] == 123
+
+    without = [{key: value for key, value in swap.items() if key != "liquidity"} for swap in rows]
+    with pytest.raises(ValueError):
+        pool_states(without, pool_id)
+    hours = [
+        {"periodStartUnix": hour, "liquidity": str(hour)}
+        for hour in {int(swap["timestamp"]) // 3600 * 3600 for swap in rows}
+    ]
+    states = pool_states(without, pool_id, hours)
+    assert states["liquidity"][0] == int(rows[0]["timestamp"]) // 3600 * 3600
+
+def test_tighter_slippage_reverts_more(swaps):
+    states = pool_states(swaps, pool_ids(swaps)[0])
+    results = simulate(states, parameter_grid([1000], [5, 500], [1]))
+    tight, loose = results
+    assert tight["revert_rate"] >= loose["revert_rate"]
+    assert loose["fill_rate"] == pytest.approx(1 - loose["revert_rate"])
+
+def test_splits_cost_more_gas(swaps):
+    states = pool_states(swaps, pool_ids(swaps)[0])
+    single, split = simulate(states, parameter_grid([1000], [100], [1, 4]), gas_price_gwei=10)
+    assert split["gas_units"] == 4 * single["gas_units"]
+    assert split["trades"] == single["trades"]
+
+def test_parallel_sweep_matches_serial(swaps):
+    states = pool_states(swaps, pool_ids(swaps)[0])
+    grid = parameter_grid([10, 1000, 100000], [5, 30, 100], [1, 2, 3])
+    serial = run_backtest(states, grid, processes=1)
+    parallel = run_backtest(states, grid, processes=2, chunk_size=5)
+    assert parallel == serial
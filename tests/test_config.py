@@ -0,0 +1,35 @@
+import pytest
+from pydantic import ValidationError
+from src.config import PERFORMANCE_PROFILES, PerformanceConfig, UniswapProjectConfig
+
+def test_performance_profiles_are_valid():
+    for profile in PERFORMANCE_PROFILES:
+        assert PerformanceConfig.from_env(profile) == PerformanceConfig(**PERFORMANCE_PROFILES[profile])
+
+def test_performance_env_override(monkeypatch):
+    monkeypatch.setenv("UNISWAP_PERF_MAX_CONCURRENT_STEPS", "12")
+    performance = PerformanceConfig.from_env("production")
+    assert performance.max_concurrent_steps == 12
+    assert performance.batch_size == PERFORMANCE_PROFILES["production"]["batch_size"]
+
+def test_performance_dict_override_is_json(monkeypatch):
+    monkeypatch.setenv("UNISWAP_PERF_TOOL_CACHE_TTLS", '{"custom_tool": 5}')
+    performance = PerformanceConfig.from_env("development")
+    assert performance.tool_cache_ttls == {"custom_tool": 5.0}
+
+def test_performance_rejects_invalid_values(monkeypatch):
+    monkeypatch.setenv("UNISWAP_PERF_BATCH_SIZE", "5000")
+    with pytest.raises(ValidationError):
+        PerformanceConfig.from_env("development")
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        PerformanceConfig.from_env("staging")
+
+def test_project_config_uses_profile(monkeypatch):
+    monkeypatch.setenv("UNISWAP_PROFILE", "test")
+    monkeypatch.setenv("UNISWAP_SLIPPAGE_BPS", "30")
+    config = UniswapProjectConfig()
+    assert config.profile == "test"
+    assert config.slippage_bps == 30
+    assert config.performance == PerformanceConfig(**PERFORMANCE_PROFILES["test"])
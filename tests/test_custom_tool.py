@@ -12,3 +12,20 @@ def test_custom_tool_runs():
     )
     result = tool.run(ctx)
     assert result == "Placeholder result from custom tool"
+
+def test_cached_custom_tool_reuses_results():
+    from src.tool_cache import ToolResultCache, with_cache
+
+    cache = ToolResultCache()
+    tool = with_cache(CustomTool(), cache, freshness=lambda: 19000000)
+    assert tool.id == "custom_tool"
+    assert tool.run(None) == "Placeholder result from custom tool"
+    assert tool.run(None) == "Placeholder result from custom tool"
+    assert cache.hits == 1
+
+def test_cached_tool_normalizes_arguments():
+    from src.tool_cache import ToolResultCache, with_cache
+
+    tool = with_cache(CustomTool(), ToolResultCache())
+    assert tool.arguments(None, "WETH") == tool.arguments(None, token="WETH", window="24h")
+    assert tool.arguments(None, token="WETH") != tool.arguments(None, token="WETH", window="1h")
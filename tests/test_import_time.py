@@ -0,0 +1,86 @@
+"""
+Cold-start guard for the CLI entry points.
+
+Each entry point is started with `python -X importtime` and the import report
+is checked for heavy dependencies and against a time budget. Run this file
+directly to print the slowest imports of every entry point.
+"""
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported on the code paths that need them
+HEAVY_MODULES = ("portia", "web3", "eth_utils", "streamlit")
+
+# Cumulative import time budget per entry point, in milliseconds
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000"))
+
+ENTRY_POINTS = {
+    "log_viewer": ["src/log_viewer.py", "--help"],
+    "trade_example": ["src/examples/trade_example.py", "--help"],
+    "main": ["-c", "import sys; sys.path.insert(0, 'src'); import main"],
+}
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def measure_imports(args):
+    """
+    Run python with -X importtime and parse its report.
+
+    Returns:
+        A dict mapping every imported module to its cumulative import time in
+        microseconds, and the total import time of the process in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules[name] = int(cumulative)
+        # Top level imports have a single space of indentation
+        if len(indent) == 1:
+            total += int(cumulative)
+    return modules, total
+
+@pytest.mark.parametrize("entry_point", sorted(ENTRY_POINTS))
+def test_entry_point_does_not_import_heavy_modules(entry_point):
+    modules, _ = measure_imports(ENTRY_POINTS[entry_point])
+    heavy = sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES)
+    assert heavy == [], f"{entry_point} imports heavy modules at startup: {heavy}"
+
+@pytest.mark.parametrize("entry_point", sorted(ENTRY_POINTS))
+def test_entry_point_import_time_budget(entry_point):
+    _, total = measure_imports(ENTRY_POINTS[entry_point])
+    assert total / 1000 < IMPORT_TIME_BUDGET_MS, (
+        f"{entry_point} took {total / 1000:.0f}ms to import, budget is {IMPORT_TIME_BUDGET_MS:.0f}ms"
+    )
+
+@pytest.mark.parametrize("script", ["src/log_viewer.py", "src/examples/trade_example.py"])
+def test_script_puts_src_on_the_path(script, tmp_path):
+    # run_path doesn't add the script's directory to sys.path, so the lazy
+    # imports only work if the script adds src itself
+    code = f"import runpy; runpy.run_path({str(ROOT / script)!r}, run_name='script'); import config"
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True, capture_output=True)
+
+if __name__ == "__main__":
+    for entry_point, args in ENTRY_POINTS.items():
+        modules, total = measure_imports(args)
+        print(f"{entry_point}: {total / 1000:.1f}ms")
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:10]
+        for name, cumulative in slowest:
+            print(f"  {cumulative / 1000:8.1f}ms  {name}")
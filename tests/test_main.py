@@ -6,3 +6,193 @@ def test_run_pipeline_basic():
     user_prompt = "Test prompt about uniswap"
     outputs = run_pipeline(user_prompt)
     assert outputs is not None
+
+def test_stream_pipeline_yields_each_step(monkeypatch):
+    from types import SimpleNamespace
+    import src.main as main
+
+    class FakePortia:
+        def plan(self, prompt):
+            return "plan"
+
+        def create_plan_run(self, plan):
+            return SimpleNamespace(outputs=SimpleNamespace(step_outputs={}), state="READY")
+
+        def resume(self, plan_run):
+            plan_run.outputs.step_outputs["$first"] = "one"
+            plan_run.outputs.step_outputs["$second"] = "two"
+            plan_run.state = "COMPLETE"
+            return plan_run
+
+    monkeypatch.setattr(main, "get_portia_instance", lambda: FakePortia())
+    *steps, final = main.stream_pipeline("Test prompt about uniswap", poll_interval=0.01)
+    assert [s["step"] for s in steps] == ["$first", "$second"]
+    assert [s["output"] for s in steps] == ["one", "two"]
+    assert all(s["elapsed"] >= 0 for s in steps)
+    assert final["state"] == "COMPLETE"
+    assert final["clarifications"] == []
+
+def test_stream_pipeline_reports_unfinished_runs(monkeypatch):
+    from types import SimpleNamespace
+    from portia.plan_run import PlanRunState
+    import src.main as main
+
+    class FakePortia:
+        def plan(self, prompt):
+            return "plan"
+
+        def create_plan_run(self, plan):
+            return SimpleNamespace(outputs=SimpleNamespace(step_outputs={}), state="READY",
+                                   get_outstanding_clarifications=lambda: ["Which pool?"])
+
+        def resume(self, plan_run):
+            plan_run.outputs.step_outputs["$first"] = "one"
+            plan_run.state = PlanRunState.NEED_CLARIFICATION
+            return plan_run
+
+    monkeypatch.setattr(main, "get_portia_instance", lambda: FakePortia())
+    *steps, final = main.stream_pipeline("Test prompt about uniswap", poll_interval=0.01)
+    assert [s["step"] for s in steps] == ["$first"]
+    assert final["state"] == PlanRunState.NEED_CLARIFICATION
+    assert final["clarifications"] == ["Which pool?"]
+
+def _fake_step(output, inputs=(), condition=None):
+    from types import SimpleNamespace
+    return SimpleNamespace(
+        output=output,
+        inputs=[SimpleNamespace(name=name) for name in inputs],
+        condition=condition,
+    )
+
+def test_plan_step_levels_groups_independent_steps():
+    from types import SimpleNamespace
+    from src.main import plan_step_levels
+
+    plan = SimpleNamespace(steps=[
+        _fake_step("$pair_1"),
+        _fake_step("$pair_2"),
+        _fake_step("$summary", inputs=["$pair_1", "$pair_2"]),
+        _fake_step("$volume"),
+        _fake_step("$slides", condition="if $summary is not empty"),
+    ])
+    assert plan_step_levels(plan) == [[0, 1, 3], [2], [4]]
+
+class FakeStepPortia:
+    """
+    Portia stand-in that, like the real one, only resumes plan runs whose
+    plan was saved to storage. Each step output is the step's task followed
+    by the upstream outputs it was seeded with. A state given in states is
+    used once, the step completes when it is resumed again.
+    """
+    def __init__(self, states=None):
+        from types import SimpleNamespace
+        self.states = states or {}
+        self.saved_plans = {}
+        self.storage = SimpleNamespace(
+            save_plan=lambda plan: self.saved_plans.__setitem__(plan.id, plan),
+            get_plan=self.saved_plans.__getitem__,
+        )
+
+    def create_plan_run(self, plan):
+        from types import SimpleNamespace
+        return SimpleNamespace(id=f"run-{plan.id}", plan_id=plan.id, state=None,
+                               outputs=SimpleNamespace(step_outputs={}))
+
+    def resume(self, plan_run):
+        from portia.plan_run import PlanRunState
+        step = self.saved_plans[plan_run.plan_id].steps[0]
+        upstream = [plan_run.outputs.step_outputs[var.name] for var in step.inputs]
+        plan_run.outputs.step_outputs[step.output] = "+".join([step.task, *upstream])
+        plan_run.state = self.states.pop(step.output, PlanRunState.COMPLETE)
+        return plan_run
+
+def _fake_step_plan(monkeypatch, steps):
+    from types import SimpleNamespace
+    import src.main as main
+
+    monkeypatch.setattr(
+        main, "_build_step_plan",
+        lambda plan, step: SimpleNamespace(id=f"plan-{step.output}", steps=[step]),
+    )
+    return SimpleNamespace(steps=steps)
+
+def _task_step(task, output, inputs=()):
+    step = _fake_step(output, inputs)
+    step.task = task
+    return step
+
+def test_execute_plan_concurrently_runs_levels(monkeypatch):
+    from src.main import execute_plan_concurrently
+
+    plan = _fake_step_plan(monkeypatch, [
+        _task_step("pair_1", "$pair_1"),
+        _task_step("pair_2", "$pair_2"),
+        _task_step("summary", "$summary", inputs=["$pair_1", "$pair_2"]),
+    ])
+    outputs, pending = execute_plan_concurrently(FakeStepPortia(), plan, max_workers=2)
+    assert list(outputs) == ["$pair_1", "$pair_2", "$summary"]
+    assert outputs["$summary"] == "summary+pair_1+pair_2"
+    assert pending == []
+
+def test_execute_plan_concurrently_stops_on_clarification_and_failure(monkeypatch):
+    import pytest
+    from portia.plan_run import PlanRunState
+    from src.main import PlanStepFailedError, execute_plan_concurrently
+
+    steps = [_task_step("pair_1", "$pair_1"), _task_step("summary", "$summary", inputs=["$pair_1"])]
+
+    plan = _fake_step_plan(monkeypatch, steps)
+    portia = FakeStepPortia({"$pair_1": PlanRunState.NEED_CLARIFICATION})
+    outputs, pending = execute_plan_concurrently(portia, plan)
+    # The step waiting on clarification has no output until it is resumed
+    assert outputs == {}
+    assert [run.plan_id for run in pending] == ["plan-$pair_1"]
+
+    portia = FakeStepPortia({"$pair_1": PlanRunState.FAILED})
+    with pytest.raises(PlanStepFailedError) as error:
+        execute_plan_concurrently(portia, plan)
+    assert error.value.step_run.plan_id == "plan-$pair_1"
+    assert "plan-$summary" not in portia.saved_plans
+
+def test_resume_plan_concurrently_runs_remaining_levels(monkeypatch):
+    from portia.plan_run import PlanRunState
+    from src.main import execute_plan_concurrently, resume_plan_concurrently
+
+    plan = _fake_step_plan(monkeypatch, [
+        _task_step("pair_1", "$pair_1"),
+        _task_step("pair_2", "$pair_2"),
+        _task_step("summary", "$summary", inputs=["$pair_1", "$pair_2"]),
+    ])
+    portia = FakeStepPortia({"$pair_2": PlanRunState.NEED_CLARIFICATION})
+    outputs, pending = execute_plan_concurrently(portia, plan)
+    assert list(outputs) == ["$pair_1"]
+    assert "plan-$summary" not in portia.saved_plans
+
+    outputs, pending = resume_plan_concurrently(portia, plan, outputs, pending)
+    assert list(outputs) == ["$pair_1", "$pair_2", "$summary"]
+    assert outputs["$summary"] == "summary+pair_1+pair_2"
+    assert pending == []
+
+def test_run_pipeline_returns_one_result_type(monkeypatch):
+    from types import SimpleNamespace
+    from portia.plan_run import PlanRunState
+    import src.main as main
+
+    plan = _fake_step_plan(monkeypatch, [_task_step("pair_1", "$pair_1")])
+    portia = FakeStepPortia({"$pair_1": PlanRunState.NEED_CLARIFICATION})
+    portia.plan = lambda prompt: plan
+    portia.run_plan = lambda plan: SimpleNamespace(
+        state=PlanRunState.COMPLETE, outputs=SimpleNamespace(step_outputs={"$pair_1": "pair_1"})
+    )
+    monkeypatch.setattr(main, "get_portia_instance", lambda: portia)
+
+    sequential = main.run_pipeline("Test prompt about uniswap")
+    assert sequential.outputs == {"$pair_1": "pair_1"}
+    assert sequential.pending_runs == []
+
+    concurrent = main.run_pipeline("Test prompt about uniswap", concurrent=True)
+    assert type(concurrent) is type(sequential)
+    assert len(concurrent.pending_runs) == 1
+    resumed = main.resume_pipeline(concurrent)
+    assert resumed.outputs == {"$pair_1": "pair_1"}
+    assert resumed.pending_runs == []
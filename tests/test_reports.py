@@ -0,0 +1,63 @@
+import os
+
+import pytest
+from src.reports import ReportRenderer, is_report_file, spec_key, top_pairs_report
+
+PAIRS = [
+    {"key": "USDC/WETH", "window": "24h", "volume_usd": 1704555.61, "swaps": 22, "vwap": 0.000402},
+    {"key": "WBTC/WETH", "window": "24h", "volume_usd": 1131816.95, "swaps": 19, "vwap": 28.51},
+    {"key": "DAI/WETH", "window": "24h", "volume_usd": 788312.64, "swaps": 30, "vwap": None},
+]
+
+def test_spec_key_ignores_key_order():
+    assert spec_key({"title": "Volume", "values": [1, 2]}) == spec_key({"values": [1, 2], "title": "Volume"})
+    assert spec_key({"title": "Volume", "values": [1, 2]}) != spec_key({"title": "Volume", "values": [1, 3]})
+
+def test_only_reports_inside_the_reports_dir_are_files(tmp_path):
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    inside = reports_dir / "top-pairs.pdf"
+    outside = tmp_path / "secret.pdf"
+    inside.write_text("report")
+    outside.write_text("secret")
+    (reports_dir / "link.pdf").symlink_to(outside)
+    assert is_report_file(str(inside), str(reports_dir))
+    assert not is_report_file(str(outside), str(reports_dir))
+    assert not is_report_file(str(reports_dir / ".." / "secret.pdf"), str(reports_dir))
+    assert not is_report_file(str(reports_dir / "link.pdf"), str(reports_dir))
+    assert not is_report_file(str(reports_dir / "missing.pdf"), str(reports_dir))
+
+@pytest.fixture
+def renderer(tmp_path):
+    pytest.importorskip("matplotlib")
+    renderer = ReportRenderer(str(tmp_path), max_workers=1)
+    yield renderer
+    renderer.shutdown()
+
+@pytest.mark.parametrize("fmt", ["pptx", "pdf"])
+def test_render_report_to_disk(renderer, fmt):
+    if fmt == "pptx":
+        pytest.importorskip("pptx")
+    path = renderer.submit(top_pairs_report(PAIRS, "24h"), fmt).result(timeout=120)
+    assert path.endswith(f".{fmt}")
+    assert os.path.getsize(path) > 0
+
+def test_reports_and_charts_are_reused(renderer):
+    spec = top_pairs_report(PAIRS, "24h")
+    first = renderer.submit(spec, "pdf").result(timeout=120)
+    charts = sorted(os.listdir(renderer.charts_dir))
+    assert len(charts) == 2
+
+    # The same report is served from disk without going to the pool
+    assert renderer.submit(spec, "pdf").result(timeout=1) == first
+
+    # A different format of the same data reuses the rendered charts
+    pytest.importorskip("pptx")
+    renderer.submit(spec, "pptx").result(timeout=120)
+    assert sorted(os.listdir(renderer.charts_dir)) == charts
+
+def test_unknown_format(tmp_path):
+    renderer = ReportRenderer(str(tmp_path), max_workers=1)
+    with pytest.raises(ValueError):
+        renderer.submit(top_pairs_report(PAIRS, "24h"), "docx")
+    renderer.shutdown()
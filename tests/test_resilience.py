@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, ResilientCaller
+
+class FaultInjectingEnso:
+    """
+    Local stand-in for the Enso route endpoint. Each request pops the next
+    fault from the script: "ok", "error" (HTTP 500), "bad_request" (HTTP 400)
+    or a delay in seconds before answering. Once the script runs out every request is "ok".
+    """
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = 0
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests += 1
+                    fault = stand_in.script.pop(0) if stand_in.script else "ok"
+                if fault in ("error", "bad_request"):
+                    self.send_response(500 if fault == "error" else 400)
+                    self.end_headers()
+                    return
+                if fault != "ok":
+                    time.sleep(fault)
+                body = json.dumps({"amountOut": "1000", "gas": "21000"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/route"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def get_optimal_route(self):
+        with urllib.request.urlopen(self.url) as response:
+            return json.loads(response.read())
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def enso():
+    servers = []
+
+    def _start(*script):
+        server = FaultInjectingEnso(script)
+        servers.append(server)
+        return server
+
+    yield _start
+    for server in servers:
+        server.close()
+
+def make_caller(**kwargs):
+    options = dict(name="enso", timeout=2.0, max_retries=2, base_delay=0.01, max_delay=0.05)
+    options.update(kwargs)
+    return ResilientCaller(**options)
+
+def test_retries_transient_errors(enso):
+    server = enso("error", "error")
+    result = make_caller().call(server.get_optimal_route)
+    assert result["amountOut"] == "1000"
+    assert server.requests == 3
+
+def test_client_errors_are_not_retried(enso):
+    server = enso("bad_request", "bad_request")
+    caller = make_caller(breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(urllib.error.HTTPError):
+        caller.call(server.get_optimal_route)
+    assert server.requests == 1
+    assert caller.breaker.state == "closed"
+
+def test_own_errors_do_not_close_an_open_circuit():
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: clock[0])
+    breaker.record_failure()
+    clock[0] = 10
+
+    def broken():
+        raise KeyError("amountOut")
+
+    with pytest.raises(KeyError):
+        make_caller(breaker=breaker).call(broken)
+    # The trial ended without closing the circuit, the next call may try again
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+def test_non_idempotent_calls_are_not_retried(enso):
+    server = enso("error")
+    with pytest.raises(urllib.error.HTTPError):
+        make_caller().call(server.get_optimal_route, idempotent=False)
+    assert server.requests == 1
+
+def test_deadline_fails_slow_calls(enso):
+    server = enso(2.0)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        make_caller(timeout=0.3).call(server.get_optimal_route)
+    assert time.monotonic() - started < 1.0
+
+def test_hedged_request_beats_slow_response(enso):
+    server = enso(1.5)
+    started = time.monotonic()
+    result = make_caller(hedge=True, hedge_delay=0.1).call(server.get_optimal_route)
+    assert result["amountOut"] == "1000"
+    assert time.monotonic() - started < 1.0
+    assert server.requests == 2
+
+def test_circuit_breaker_fails_fast_and_recovers(enso):
+    server = enso("error", "error")
+    caller = make_caller(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    for _ in range(2):
+        with pytest.raises(urllib.error.HTTPError):
+            caller.call(server.get_optimal_route)
+    assert caller.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(server.get_optimal_route)
+    assert server.requests == 2
+
+    time.sleep(0.25)
+    assert caller.breaker.state == "half_open"
+    assert caller.call(server.get_optimal_route)["amountOut"] == "1000"
+    assert caller.breaker.state == "closed"
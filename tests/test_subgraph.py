@@ -0,0 +1,37 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+
+def test_latest_block_never_waits_on_the_subgraph(monkeypatch):
+    import src.subgraph as subgraph
+
+    release = threading.Event()
+    calls = []
+
+    def slow_query(query, variables=None, endpoint=None, session=None, timeout=None):
+        calls.append(timeout)
+        release.wait(5)
+        return {"_meta": {"block": {"number": "19000000"}}}
+
+    performance = SimpleNamespace(freshness_poll_interval=60.0, freshness_timeout=0.5)
+    monkeypatch.setattr(subgraph, "get_project_config",
+                        lambda: SimpleNamespace(uniswap_endpoint="http://subgraph", performance=performance))
+    monkeypatch.setattr(subgraph, "query_subgraph", slow_query)
+    monkeypatch.setattr(subgraph, "_latest_block", {"number": None, "checked_at": None, "refreshing": False})
+
+    started = time.monotonic()
+    assert [subgraph.get_latest_indexed_block() for _ in range(5)] == [None] * 5
+    assert time.monotonic() - started < 0.5
+    # A single refresh is in flight, with the short timeout
+    assert calls == [0.5]
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while subgraph.get_latest_indexed_block() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert subgraph.get_latest_indexed_block() == 19000000
+    assert len(calls) == 1
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+from src.swap_aggregator import WINDOWS, SwapAggregator, SwapIngestLoop, load_swaps, replay
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "synthetic_swaps.json")
+
+WETH = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+DAI = "0x6b175474e89094c44da98b954eedeac495271d0f"
+WBTC = "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599"
+
+@pytest.fixture
+def swaps():
+    return load_swaps(FIXTURE)
+
+def brute_force_volume(swaps, address, window, now):
+    """
+    Volume of a token over the window, aligned to the window's buckets.
+    """
+    span, buckets = WINDOWS[window]
+    bucket_seconds = span // buckets
+    oldest_bucket = now // bucket_seconds - buckets + 1
+    return sum(
+        float(swap["amountUSD"])
+        for swap in swaps
+        if address in (swap["token0"]["id"], swap["token1"]["id"])
+        and int(swap["timestamp"]) // bucket_seconds >= oldest_bucket
+    )
+
+def test_replay_matches_brute_force(swaps):
+    aggregator = replay(SwapAggregator(), swaps)
+    now = max(int(swap["timestamp"]) for swap in swaps)
+    for window in WINDOWS:
+        for address in (WETH, USDC, DAI, WBTC):
+            stats = aggregator.stats(address, window)
+            assert stats["volume_usd"] == pytest.approx(brute_force_volume(swaps, address, window, now))
+
+def test_windows_expire_old_buckets(swaps):
+    aggregator = replay(SwapAggregator(), swaps)
+    last = aggregator.latest_timestamp
+    day_swaps = aggregator.stats(WETH, "24h")["swaps"]
+    assert aggregator.stats(WETH, "1h")["swaps"] < day_swaps
+    # Windows only move forward, so check the later times last
+    assert aggregator.stats(WETH, "24h", now=last + 2 * 3600)["swaps"] < day_swaps
+    assert aggregator.stats(WETH, "1h", now=last + 2 * 3600)["swaps"] == 0
+    assert aggregator.latest_block == max(int(swap["transaction"]["blockNumber"]) for swap in swaps)
+
+def test_pair_vwap_and_inversion(swaps):
+    aggregator = replay(SwapAggregator(), swaps)
+    usdc_per_weth = aggregator.stats(f"{WETH}/{USDC}", "7d")
+    weth_per_usdc = aggregator.stats(f"{USDC}/{WETH}", "7d")["vwap"]
+    assert usdc_per_weth["label"] == "WETH/USDC"
+    usdc_per_weth = usdc_per_weth["vwap"]
+    assert 2000 < usdc_per_weth < 3000
+    assert usdc_per_weth * weth_per_usdc == pytest.approx(1)
+
+def test_spoofed_symbols_are_kept_apart(swaps):
+    spoof = "0x000000000000000000000000000000000000dead"
+    fake = dict(swaps[0], id="fake#0", amountUSD="1000000000",
+                token0={"id": spoof, "symbol": "usdc", "decimals": "6"})
+    aggregator = replay(SwapAggregator(), swaps + [fake])
+    assert aggregator.addresses("USDC") == sorted([USDC, spoof])
+    assert aggregator.stats(USDC, "7d")["volume_usd"] == pytest.approx(
+        brute_force_volume(swaps, USDC, "7d", aggregator.latest_timestamp)
+    )
+
+def test_top_pairs(swaps):
+    top = replay(SwapAggregator(), swaps).top_pairs("7d", limit=2)
+    assert len(top) == 2
+    assert top[0]["volume_usd"] >= top[1]["volume_usd"]
+
+def test_memory_is_bounded(swaps):
+    aggregator = replay(SwapAggregator(max_keys=3), swaps)
+    assert len(aggregator.series) == 3
+    assert aggregator.stats("0x0000000000000000000000000000000000000000") is None
+    assert len(aggregator.token_symbols) <= 3
+
+def test_ingest_loop_pages_without_duplicates(swaps):
+    ordered = sorted(swaps, key=lambda swap: (int(swap["timestamp"]), swap["id"]))
+    # Repeat a timestamp across a page boundary, like a block with several swaps
+    ordered[5] = dict(ordered[5], timestamp=ordered[4]["timestamp"])
+
+    def fetch(since, first, skip):
+        return [swap for swap in ordered if int(swap["timestamp"]) >= since][skip:skip + first]
+
+    aggregator = SwapAggregator()
+    loop = SwapIngestLoop(aggregator, fetch_swaps=fetch, batch_size=5)
+    loop.since = 0
+    assert loop.poll_once() == len(ordered)
+    assert loop.poll_once() == 0
+    assert aggregator.stats(WETH, "7d")["swaps"] == len(ordered)
+
+def test_ingest_loop_pages_through_a_busy_timestamp(swaps):
+    # More swaps in one block than fit in a page, then a few later ones
+    busy = [dict(swap, id=f"busy#{i}", timestamp="100") for i, swap in enumerate(swaps[:6])]
+    later = [dict(swap, id=f"later#{i}", timestamp=str(200 + i)) for i, swap in enumerate(swaps[6:10])]
+    ordered = busy + later
+
+    def fetch(since, first, skip):
+        return [swap for swap in ordered if int(swap["timestamp"]) >= since][skip:skip + first]
+
+    aggregator = SwapAggregator()
+    loop = SwapIngestLoop(aggregator, fetch_swaps=fetch, batch_size=5)
+    loop.since = 0
+    assert loop.poll_once() == 10
+    assert loop.since == 203
+    assert loop.poll_once() == 0
+
+def test_top_pairs_while_pairs_are_evicted(swaps):
+    import threading
+
+    aggregator = SwapAggregator(max_keys=4)
+    stop = threading.Event()
+
+    def ingest():
+        while not stop.is_set():
+            replay(aggregator, swaps)
+
+    thread = threading.Thread(target=ingest)
+    thread.start()
+    try:
+        for _ in range(200):
+            assert all(stats is not None for stats in aggregator.top_pairs("7d"))
+    finally:
+        stop.set()
+        thread.join()
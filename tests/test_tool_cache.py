@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+from src.tool_cache import ToolResultCache, canonical_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_canonical_key_ignores_argument_order():
+    assert canonical_key("custom_tool", {"a": 1, "b": 2}, 100) == canonical_key("custom_tool", {"b": 2, "a": 1}, 100)
+    assert canonical_key("custom_tool", {"a": 1}, 100) != canonical_key("custom_tool", {"a": 1}, 101)
+    assert canonical_key("custom_tool", {"a": 1}, 100) != canonical_key("other_tool", {"a": 1}, 100)
+
+def test_cache_hit_and_new_block_miss():
+    cache = ToolResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("custom_tool", {"token": "WETH"}, 100, compute) == 1
+    assert cache.get_or_compute("custom_tool", {"token": "WETH"}, 100, compute) == 1
+    assert cache.get_or_compute("custom_tool", {"token": "WETH"}, 101, compute) == 2
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+def test_ttl_and_per_tool_policies():
+    clock = FakeClock()
+    cache = ToolResultCache(default_ttl=10, ttl_policies={"live_tool": 0}, clock=clock)
+    counter = iter(range(100))
+
+    first = cache.get_or_compute("custom_tool", {}, None, lambda: next(counter))
+    clock.now += 5
+    assert cache.get_or_compute("custom_tool", {}, None, lambda: next(counter)) == first
+    clock.now += 10
+    assert cache.get_or_compute("custom_tool", {}, None, lambda: next(counter)) != first
+
+    # A TTL of 0 disables caching for that tool
+    assert cache.get_or_compute("live_tool", {}, None, lambda: next(counter)) != cache.get_or_compute(
+        "live_tool", {}, None, lambda: next(counter)
+    )
+
+def test_invalid_results_are_recomputed(tmp_path):
+    report = tmp_path / "top-pairs.pdf"
+    report.write_text("report")
+    cache = ToolResultCache(cache_dir=str(tmp_path / "cache"))
+    valid = lambda value: os.path.isfile(value)
+    assert cache.get_or_compute("custom_tool", {}, 100, lambda: str(report), valid) == str(report)
+    report.unlink()
+    assert cache.get_or_compute("custom_tool", {}, 100, lambda: "rendered again", valid) == "rendered again"
+
+def test_lru_eviction():
+    cache = ToolResultCache(max_entries=2)
+    for token in ("WETH", "DAI", "USDC"):
+        cache.get_or_compute("custom_tool", {"token": token}, None, lambda: token)
+    assert len(cache.entries) == 2
+    assert cache.get_or_compute("custom_tool", {"token": "WETH"}, None, lambda: "recomputed") == "recomputed"
+
+def test_disk_tier_is_shared(tmp_path):
+    writer = ToolResultCache(cache_dir=str(tmp_path))
+    reader = ToolResultCache(cache_dir=str(tmp_path))
+    writer.get_or_compute("custom_tool", {"token": "WETH"}, 100, lambda: {"volume": 42})
+    assert reader.get_or_compute("custom_tool", {"token": "WETH"}, 100, lambda: None) == {"volume": 42}
+    assert reader.hits == 1
+
+def test_disk_tier_skips_values_json_cannot_hold(tmp_path):
+    writer = ToolResultCache(cache_dir=str(tmp_path))
+    writer.get_or_compute("custom_tool", {}, 100, lambda: ("WETH", 42))
+    assert writer.get_or_compute("custom_tool", {}, 100, lambda: None) == ("WETH", 42)
+    assert list(tmp_path.iterdir()) == []
+
+def test_concurrent_callers_compute_once():
+    cache = ToolResultCache()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "result"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("custom_tool", {}, 100, compute)))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["result"] * 10
+
+def test_errors_are_not_cached():
+    cache = ToolResultCache()
+
+    def fail():
+        raise RuntimeError("subgraph down")
+
+    try:
+        cache.get_or_compute("custom_tool", {}, 100, fail)
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("custom_tool", {}, 100, lambda: "ok") == "ok"